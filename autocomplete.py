@@ -0,0 +1,166 @@
+import re
+from bisect import bisect_left
+from collections import Counter
+
+# In-memory indexes behind app command autocomplete: each user's character
+# names, each character's inventory item names and (in catalog.py) each
+# location's enemy names. They are loaded once and then kept current by the
+# database helpers that create, rename and delete characters or move items,
+# so a keystroke is a bisect into a sorted list and never a query. Those
+# helpers write on the DB thread while autocomplete reads straight from the
+# event loop, so a PrefixIndex is never changed in place: every write swaps
+# in a new list and a search works on whichever list it started with.
+
+# Discord shows at most 25 choices
+MAX_CHOICES = 25
+
+# Custom emoji markup such as <:wizard_potion:1372986090046357657>, which nobody can type
+_EMOJI = re.compile(r"<a?:\w+:\d+>")
+
+def fold(text):
+    # What a user would type for a name: no emoji markup, case-insensitive, single spaces
+    return " ".join(_EMOJI.sub(" ", text).casefold().split())
+
+def label(name):
+    # Choice labels can't render emoji markup; drop it and keep Discord's 100 character limit
+    return " ".join(_EMOJI.sub(" ", name).split())[:100] or name[:100]
+
+class PrefixIndex:
+    """Sorted (key, name) pairs with every name filed under each of its word starts."""
+
+    __slots__ = ("keys",)
+
+    def __init__(self, names=()):
+        self.keys = sorted({pair for name in names for pair in self._pairs(name)})
+
+    def __len__(self):
+        return len(self.keys)
+
+    @staticmethod
+    def _pairs(name):
+        # "Minor Healing Potion" can be found by typing "min", "heal" or "pot"
+        words = fold(name).split(" ")
+        return {(" ".join(words[i:]), name) for i in range(len(words))}
+
+    def replace(self, old=None, new=None):
+        # Remove `old` and/or add `new` in one swap of the list
+        keys = list(self.keys)
+        if old is not None:
+            for pair in self._pairs(old):
+                i = bisect_left(keys, pair)
+                if i < len(keys) and keys[i] == pair:
+                    del keys[i]
+        if new is not None:
+            for pair in self._pairs(new):
+                i = bisect_left(keys, pair)
+                if i == len(keys) or keys[i] != pair:
+                    keys.insert(i, pair)
+        self.keys = keys
+
+    def add(self, name):
+        self.replace(new=name)
+
+    def remove(self, name):
+        self.replace(old=name)
+
+    def search(self, text, limit=MAX_CHOICES):
+        prefix = fold(text)
+        keys = self.keys
+        found = {}  # Ordered set; a name can match at more than one word
+        for i in range(bisect_left(keys, (prefix,)), len(keys)):
+            key, name = keys[i]
+            if not key.startswith(prefix) or len(found) >= limit:
+                break
+            found[name] = None
+        return list(found)
+
+class Completions:
+    def __init__(self):
+        self.loaded = False
+        # user_id -> PrefixIndex of their character names
+        self.characters = {}
+        # (user_id, character name) -> character_id, and character_id -> [user_id, name, active location]
+        self.ids = {}
+        self.owners = {}
+        # character_id -> PrefixIndex of held item names, plus the count held under each name
+        self.items = {}
+        self.counts = {}
+
+    def load(self, characters, items):
+        # characters: (character_id, user_id, name, active location); items: (character_id, item name, quantity)
+        names = {}
+        self.ids, self.owners = {}, {}
+        for character_id, user_id, name, location in characters:
+            names.setdefault(user_id, []).append(name)
+            self.ids[user_id, name] = character_id
+            self.owners[character_id] = [user_id, name, location]
+        self.characters = {user_id: PrefixIndex(user_names) for user_id, user_names in names.items()}
+
+        self.counts = {character_id: Counter() for character_id in self.owners}
+        for character_id, name, quantity in items:
+            if character_id in self.counts:
+                self.counts[character_id][name] += quantity
+        self.items = {character_id: PrefixIndex(name for name, count in counts.items() if count > 0)
+                      for character_id, counts in self.counts.items()}
+        self.loaded = True
+
+    def add_character(self, character_id, user_id, name):
+        if not self.loaded:
+            return
+        self.characters.setdefault(user_id, PrefixIndex()).add(name)
+        self.ids[user_id, name] = character_id
+        self.owners[character_id] = [user_id, name, None]
+        self.counts[character_id] = Counter()
+        self.items[character_id] = PrefixIndex()
+
+    def remove_character(self, character_id):
+        owner = self.owners.pop(character_id, None)
+        if owner is None:
+            return
+        user_id, name, _ = owner
+        self.characters[user_id].remove(name)
+        if not self.characters[user_id]:
+            del self.characters[user_id]
+        del self.ids[user_id, name]
+        self.counts.pop(character_id, None)
+        self.items.pop(character_id, None)
+
+    def rename_character(self, character_id, new_name):
+        owner = self.owners.get(character_id)
+        if owner is None:
+            return
+        user_id, name, _ = owner
+        self.characters[user_id].replace(name, new_name)
+        self.ids[user_id, new_name] = character_id
+        del self.ids[user_id, name]
+        owner[1] = new_name
+
+    def move_character(self, user_id, name, location):
+        character_id = self.ids.get((user_id, name))
+        if character_id is not None:
+            self.owners[character_id][2] = location
+
+    def item_changed(self, character_id, name, quantity):
+        counts = self.counts.get(character_id)
+        if counts is None:
+            return
+        before = counts[name]
+        counts[name] += quantity
+        if before <= 0 < counts[name]:
+            self.items[character_id].add(name)
+        elif counts[name] <= 0 < before:
+            self.items[character_id].remove(name)
+        if counts[name] == 0:
+            del counts[name]
+
+    def character_names(self, user_id, text):
+        index = self.characters.get(user_id)
+        return index.search(text) if index else []
+
+    def item_names(self, user_id, character_name, text):
+        index = self.items.get(self.ids.get((user_id, character_name)))
+        return index.search(text) if index else []
+
+    def location(self, user_id, character_name):
+        owner = self.owners.get(self.ids.get((user_id, character_name)))
+        return owner[2] if owner else None
@@ -0,0 +1,111 @@
+"""Autocomplete latency: in-memory on the event loop vs the DB thread vs storage.py.
+
+Answers --queries character-name completions three ways against a throwaway
+copy of the database: straight from the in-memory index on the event loop
+(single-process bots), through database.run() on the DB executor thread, and
+through a storage.py process over a Unix socket (sharded deployments). The
+first two are also measured while --writers players loot as fast as they can,
+so the DB thread is busy with their writes and flushes.
+
+    python benchmarks/autocomplete.py --players 200 --queries 2000 --writers 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+
+from commands import FakeInteraction
+from workload import ROOT, copy_database, database, loot_once, percentile, seed_players
+
+async def measure(label, query, queries, players):
+    latencies = []
+    for _ in range(queries):
+        user_id = random.randrange(players)
+        start = time.perf_counter()
+        await query(user_id, random.choice(["", "b", "bench", f"bench_{user_id}"]))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f"{label:<22} p50 {percentile(latencies, 0.50) * 1e6:>9.1f}us  "
+          f"p99 {percentile(latencies, 0.99) * 1e6:>9.1f}us  max {latencies[-1] * 1e6:>9.1f}us")
+
+async def with_writers(writers, players, work):
+    # Loot traffic on the DB thread for as long as `work` runs
+    done = False
+
+    async def writer():
+        while not done:
+            user_id = random.randrange(players)
+            await database.run(loot_once, user_id, f"bench_{user_id}")
+
+    tasks = [asyncio.create_task(writer()) for _ in range(writers)]
+    try:
+        await work
+    finally:
+        done = True
+        await asyncio.gather(*tasks)
+
+async def local_modes(args, main):
+    async def direct(user_id, text):
+        await main.complete_character_name(FakeInteraction(user_id), text)
+
+    async def executor(user_id, text):
+        await database.run(database.complete_character_names, user_id, text)
+
+    await database.run(database.load_completions)
+    await measure("in-memory", direct, args.queries, args.players)
+    await measure("DB thread", executor, args.queries, args.players)
+    await with_writers(args.writers, args.players, measure("in-memory, busy", direct, args.queries, args.players))
+    await with_writers(args.writers, args.players, measure("DB thread, busy", executor, args.queries, args.players))
+
+async def remote_mode(args):
+    async def remote(user_id, text):
+        await database.run(database.complete_character_names, user_id, text)
+
+    await measure("storage.py round trip", remote, args.queries, args.players)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--writers", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_database(tmp)
+        seed_players(args.players)
+        database.flush_pending()
+        database.close_connection()
+        os.environ["DB_PATH"] = database.DB_NAME
+        import main as bot  # Imported late so it picks up the benchmark database
+
+        asyncio.run(local_modes(args, bot))
+        # Hand the database over to the storage process
+        database.call(database.flush_pending)
+        database.call(database.close_connection)
+
+        # A storage process serving the same database, as launcher.py would start it
+        address = os.path.join(tmp, "storage.sock")
+        authkey = secrets.token_hex(16)
+        env = dict(os.environ, STORAGE_ADDRESS=address, STORAGE_AUTHKEY=authkey)
+        storage = subprocess.Popen([sys.executable, os.path.join(ROOT, "storage.py")], env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while not os.path.exists(address):
+                if storage.poll() is not None:
+                    sys.exit("storage.py exited before it started listening")
+                time.sleep(0.05)
+            database.STORAGE_ADDRESS = address
+            database.STORAGE_AUTHKEY = authkey.encode()
+            asyncio.run(remote_mode(args))
+            database.shutdown()
+        finally:
+            storage.terminate()
+            storage.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Concurrency stress test for per-character command serialization.
+
+Hammers one character with simultaneous /buy, /sell_item and Fight button
+presses through the real callbacks (same stubs as commands.py) and checks
+the invariants the character locks are meant to guarantee. The character is
+renamed after its fight starts and healed with /add_hp under the new name
+while the Fight button still knows it by the old one:
+
+    gp        never negative, and equal to start - spent + earned
+    hp        equal to start HP minus every bit of damage reported plus every heal
+    rounds    one encounter round per Fight press
+
+Run with --unlocked to swap the locks for no-ops.
+
+    python benchmarks/character_stress.py --rounds 20 --presses 50
+"""
+import argparse
+import asyncio
+import contextlib
+import re
+import sys
+import tempfile
+
+from commands import FakeInteraction, invoke
+from workload import copy_database, database
+
+NAME = "stress"
+RENAMED = "stress_renamed"
+USER_ID = 1
+START_GP = 100
+START_HP = 1_000_000
+
+class NoLocks:
+    @contextlib.asynccontextmanager
+    async def hold(self, key):
+        yield
+
+def reported(messages, pattern):
+    total = 0
+    for message in messages:
+        text = message.content or (message.embed.description if message.embed else "") or ""
+        match = re.search(pattern, text)
+        if match:
+            total += int(match.group(1))
+    return total
+
+async def economy_round(main, potion, price, concurrency):
+    # More buyers than START_GP can pay for, racing against sellers of the same item
+    character_id = await database.run(database.get_character_id, USER_ID, NAME)
+    await database.run(lambda: setattr(database.pending.load(database.get_connection(), character_id), "gp", START_GP))
+    buys = [invoke(main.client.tree.get_command("buy"), USER_ID, character_name=NAME, item=potion) for _ in range(concurrency)]
+    sells = [invoke(main.client.tree.get_command("sell_item"), USER_ID, character_name=NAME, item_name=potion) for _ in range(concurrency)]
+    results = await asyncio.gather(*buys, *sells)
+    messages = [m for interaction in results for m in interaction.response.messages]
+
+    bought = sum(1 for m in messages if m.content and m.content.startswith("Bought"))
+    earned = reported(messages, r"Sold .* for (\d+) GP")
+    gp = (await database.run(database.get_profile, USER_ID, NAME))[0][7]
+    expected = START_GP - bought * price + earned
+    return gp, expected
+
+async def fight_round(main, presses):
+    character_id = await database.run(database.get_character_id, USER_ID, NAME)
+    await database.run(database.set_character_hp, character_id, START_HP)
+    view = await main.start_encounter(character_id, NAME, ("Stress Dummy", "Never dies."), "High School", 0)
+    encounter = main.encounters.get(view.encounter_id)
+    encounter.enemy_hp = encounter.max_enemy_hp = 10**9
+
+    command = main.client.tree.get_command
+    await invoke(command("rename_character"), USER_ID, old_name=NAME, new_name=RENAMED)
+    interactions = [FakeInteraction(USER_ID) for _ in range(presses)]
+    results = await asyncio.gather(*(view.fight.callback(interaction) for interaction in interactions),
+                                   *(invoke(command("add_hp"), USER_ID, character_name=RENAMED, amount=1) for _ in range(presses)))
+    heals = sum(1 for interaction in results[presses:] for m in interaction.response.messages if m.embed is not None)
+    messages = [m for interaction in interactions for m in interaction.response.messages]
+
+    taken = reported(messages, r"took (\d+) damage")
+    hp = (await database.run(database.get_combat_stats, character_id))[1]
+    rounds = encounter.combat_round - 1
+    await view.end(encounter)
+    await invoke(command("rename_character"), USER_ID, old_name=RENAMED, new_name=NAME)
+    return hp, START_HP - taken + heals, rounds
+
+async def stress(args):
+    import main  # Imported late so it picks up the stress database
+    import locks
+
+    if args.unlocked:
+        locks.character_locks = main.character_locks = NoLocks()
+
+    await database.run(database.setup_database)
+    await database.run(database.refresh_catalog)
+    await invoke(main.client.tree.get_command("create_character"), USER_ID, name=NAME)
+    # Max HP well above START_HP, so /add_hp is never capped
+    character_id = await database.run(database.get_character_id, USER_ID, NAME)
+    await database.run(database.set_level, character_id, START_HP)
+    potion = next(iter(main.client.shop_items))
+    price = main.client.shop_items[potion]["price"]
+
+    failures = 0
+    for i in range(args.rounds):
+        gp, expected_gp = await economy_round(main, potion, price, args.presses)
+        hp, expected_hp, rounds = await fight_round(main, args.presses)
+        problems = []
+        if gp < 0:
+            problems.append(f"negative gp {gp}")
+        if gp != expected_gp:
+            problems.append(f"gp {gp} != {expected_gp}")
+        if hp != expected_hp:
+            problems.append(f"hp {hp} != {expected_hp} ({hp - expected_hp} damage lost)")
+        if rounds != args.presses:
+            problems.append(f"{rounds} rounds for {args.presses} presses")
+        failures += bool(problems)
+        print(f"round {i + 1:>3}: " + ("; ".join(problems) if problems else "ok"))
+
+    await database.run(database.flush_pending)
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--presses", type=int, default=50, help="concurrent calls of each kind per round")
+    parser.add_argument("--unlocked", action="store_true", help="disable the character locks")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_database(tmp)
+        failures = asyncio.run(stress(args))
+        database.shutdown()
+
+    print(f"{args.rounds - failures}/{args.rounds} rounds passed")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
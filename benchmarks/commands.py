@@ -0,0 +1,200 @@
+"""Load benchmark that drives the real slash-command callbacks.
+
+Each command in client.tree is invoked with stub Interaction objects against
+a throwaway copy of the database, --concurrency calls at a time, and the
+Fight button of the EncounterView returned by /fight is pressed until the
+fight ends. Latency percentiles and ops/sec per command are printed and saved
+as JSON so runs can be compared over time.
+
+    python benchmarks/commands.py --players 50 --ops 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from workload import ROOT, copy_database, database, percentile
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+class FakeResponse:
+    def __init__(self):
+        self.messages = []
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def send_message(self, content=None, *, embed=None, view=None, ephemeral=False, **kwargs):
+        self._done = True
+        self.messages.append(SimpleNamespace(content=content, embed=embed, view=view, ephemeral=ephemeral))
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the command and button callbacks."""
+
+    def __init__(self, user_id):
+        self.user = SimpleNamespace(id=user_id, name=f"bench_user_{user_id}")
+        self.response = FakeResponse()
+        self.guild_id = None
+        self.channel_id = None
+        self.created_at = datetime.now(timezone.utc)
+
+    @property
+    def view(self):
+        for message in reversed(self.response.messages):
+            if message.view is not None:
+                return message.view
+        return None
+
+def player_name(i):
+    return f"bench_{i}"
+
+async def invoke(command, user_id, **params):
+    interaction = FakeInteraction(user_id)
+    await command.callback(interaction, **params)
+    return interaction
+
+async def measure(label, calls, concurrency):
+    # calls: zero-argument coroutine factories; returns per-call latencies in seconds
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def timed(call):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call()
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(call) for call in calls))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "command": label,
+        "calls": len(latencies),
+        "errors": errors,
+        "ops_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+async def fight_until_done(tree, user_id, name):
+    # /fight, then keep pressing Fight on whatever view the bot hands back
+    interaction = await invoke(tree.get_command("fight"), user_id, character_name=name, enemy_name="a")
+    view = interaction.view
+    if view is not None and hasattr(view, "choice"):
+        # "a" matches several enemies, so the bot asks which one: take the best match
+        view.choice._values = ["0"]
+        pick = FakeInteraction(user_id)
+        await view.choice.callback(pick)
+        view = pick.view
+    presses = 0
+    while view is not None and not view.is_finished() and presses < 200:
+        press = FakeInteraction(user_id)
+        await view.fight.callback(press)
+        view = press.view
+        presses += 1
+
+async def run_benchmark(args):
+    import main  # Imported late so it picks up the benchmark database
+
+    tree = main.client.tree
+    command = tree.get_command
+    await database.run(database.setup_database)
+    await database.run(database.refresh_catalog)
+
+    players = range(args.players)
+    area = args.area
+    shop_item = next(iter(main.client.shop_items))
+
+    def spread(factory):
+        return [lambda i=i: factory(i % args.players) for i in range(args.ops)]
+
+    results = [
+        await measure("create_character", [
+            lambda i=i: invoke(command("create_character"), i, name=player_name(i)) for i in players
+        ], args.concurrency),
+        await measure("explore", spread(
+            lambda i: invoke(command("explore"), i, character_name=player_name(i), area=area)
+        ), args.concurrency),
+        await measure("loot", spread(
+            lambda i: invoke(command("loot"), i, character_name=player_name(i))
+        ), args.concurrency),
+        await measure("profile", spread(
+            lambda i: invoke(command("profile"), i, character_name=player_name(i))
+        ), args.concurrency),
+        await measure("buy", spread(
+            lambda i: invoke(command("buy"), i, character_name=player_name(i), item=shop_item)
+        ), args.concurrency),
+        await measure("sell_item", spread(
+            lambda i: invoke(command("sell_item"), i, character_name=player_name(i), item_name=shop_item)
+        ), args.concurrency),
+        await measure("fight", spread(
+            lambda i: fight_until_done(tree, i, player_name(i))
+        ), args.concurrency),
+    ]
+    await database.run(database.flush_pending)
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--ops", type=int, default=500, help="calls per command")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--area", default="High School")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="where to write the JSON results (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_database(tmp)
+        os.environ["DB_PATH"] = database.DB_NAME
+        results = asyncio.run(run_benchmark(args))
+        database.shutdown()
+
+    print(f"{'command':<18} {'calls':>6} {'errors':>6} {'ops/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for r in results:
+        print(f"{r['command']:<18} {r['calls']:>6} {r['errors']:>6} {r['ops_per_sec']:>8.0f} "
+              f"{r['p50_ms']:>6.2f}ms {r['p95_ms']:>6.2f}ms {r['p99_ms']:>6.2f}ms")
+
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "storage_profile": database.STORAGE_PROFILE,
+        "settings": vars(args),
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(run, f, indent=2)
+    print(f"Saved {output}")
+
+if __name__ == "__main__":
+    main()
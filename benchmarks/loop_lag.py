@@ -0,0 +1,73 @@
+"""Event-loop lag while many players spam /loot at once.
+
+Runs the same loot workload twice against a throwaway copy of the game
+database: once calling sqlite inline on the event loop (the old behaviour)
+and once through database.run() on the DB executor thread.
+
+    python benchmarks/loop_lag.py --players 50 --rounds 20
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+from workload import copy_database, database, loot_once, percentile, seed_players
+
+TICK = 0.005
+
+async def run_mode(mode, players, rounds):
+    lags = []
+    done = asyncio.Event()
+
+    async def monitor():
+        # A healthy loop wakes up right after TICK; anything more is lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    async def player(i):
+        for _ in range(rounds):
+            if mode == "blocking":
+                loot_once(i, f"bench_{i}")
+            else:
+                await database.run(loot_once, i, f"bench_{i}")
+            await asyncio.sleep(0)
+
+    monitor_task = asyncio.create_task(monitor())
+    start = time.perf_counter()
+    await asyncio.gather(*(player(i) for i in range(players)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await monitor_task
+    return elapsed, lags
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--profile", default=database.STORAGE_PROFILE, choices=list(database.STORAGE_PROFILES))
+    args = parser.parse_args()
+    database.STORAGE_PROFILE = args.profile
+
+    print(f"{'mode':<10} {'loots/s':>9} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}")
+    for mode in ("blocking", "executor"):
+        with tempfile.TemporaryDirectory() as tmp:
+            copy_database(tmp)
+            await database.run(seed_players, args.players)
+
+            elapsed, lags = await run_mode(mode, args.players, args.rounds)
+
+            database.flush_pending()
+            database.close_connection()
+            await database.run(database.close_connection)
+
+        lags.sort()
+        ops = args.players * args.rounds / elapsed
+        print(f"{mode:<10} {ops:>9.0f} {percentile(lags, 0.5) * 1000:>7.2f}ms "
+              f"{percentile(lags, 0.99) * 1000:>7.2f}ms {max(lags, default=0) * 1000:>7.2f}ms")
+
+    database.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
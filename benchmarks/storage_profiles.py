@@ -0,0 +1,66 @@
+"""Commands/sec for each storage profile against a copy of the real database.
+
+Each worker is a separate process with its own connection playing its own
+characters, so the numbers include WAL reader/writer concurrency and
+busy_timeout behaviour. The write-behind buffer is switched off so every
+command commits and the pragmas are what is being measured.
+
+    python benchmarks/storage_profiles.py --commands 2000 --workers 4
+"""
+import argparse
+import multiprocessing
+import tempfile
+import time
+
+from workload import copy_database, database, mixed_command, seed_players
+
+def worker(db_path, profile, first, last, commands):
+    # Plays bench_<first> .. bench_<last - 1> in turn; the blocks of different workers don't overlap
+    database.DB_NAME = db_path
+    database.STORAGE_PROFILE = profile
+    database.pending.max_pending = 0
+    database.refresh_catalog()
+
+    errors = 0
+    start = time.perf_counter()
+    for i in range(commands):
+        player = first + i % (last - first)
+        try:
+            mixed_command(player, f"bench_{player}")
+        except Exception:  # "database is locked" and friends
+            errors += 1
+    return time.perf_counter() - start, errors
+
+def run_profile(profile, commands, workers, players):
+    database.STORAGE_PROFILE = profile
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = copy_database(tmp)
+        seed_players(players)
+        database.close_connection()
+
+        per_worker = commands // workers
+        start = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.starmap(worker, [(db_path, profile, w * players // workers, (w + 1) * players // workers, per_worker)
+                                            for w in range(workers)])
+        elapsed = time.perf_counter() - start
+
+    return per_worker * workers / elapsed, sum(errors for _, errors in results)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--profiles", nargs="*", default=list(database.STORAGE_PROFILES))
+    args = parser.parse_args()
+    if args.players < args.workers:
+        parser.error("--players must be at least --workers, so every worker has characters of its own")
+
+    print(f"{'profile':<12} {'commands/s':>11} {'errors':>7}")
+    for profile in args.profiles:
+        rate, errors = run_profile(profile, args.commands, args.workers, args.players)
+        print(f"{profile:<12} {rate:>11.0f} {errors:>7}")
+
+if __name__ == "__main__":
+    main()
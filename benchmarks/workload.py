@@ -0,0 +1,60 @@
+"""Shared helpers for the benchmark scripts: throwaway DB copies and a typical command mix."""
+import os
+import random
+import shutil
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# The benchmarks hammer the same players far past any per-command budget
+os.environ.setdefault("RATE_LIMITS", "0")
+
+import database
+
+SOURCE_DB = os.path.join(ROOT, "game_database.db")
+
+def copy_database(directory, name="bench.db"):
+    # Point the database module at a private copy of the real DB
+    database.DB_NAME = os.path.join(directory, name)
+    shutil.copyfile(SOURCE_DB, database.DB_NAME)
+    database.setup_database()
+    conn = database.connect()
+    database.load_content(conn)
+    database.world.load(conn)
+    conn.close()
+    return database.DB_NAME
+
+def seed_players(players, location="High School"):
+    for i in range(players):
+        name = f"bench_{i}"
+        database.create_character(i, name)
+        database.set_active_location(i, name, location)
+
+def loot_once(user_id, character_name):
+    # The DB work of one successful /loot
+    location = database.get_active_location(user_id, character_name)
+    loot = database.world.random_loot(location)
+    if loot:
+        database.add_loot_to_character(character_name, loot)
+    database.update_character_xp(character_name, 10)
+
+def mixed_command(user_id, character_name):
+    # Rough production mix: mostly /loot, then profile views, fights and shop traffic
+    roll = random.random()
+    if roll < 0.5:
+        loot_once(user_id, character_name)
+    elif roll < 0.7:
+        database.get_profile(user_id, character_name)
+    elif roll < 0.85:
+        character_id = database.get_character_id(user_id, character_name)
+        level, hp, _ = database.get_combat_stats(character_id)
+        database.set_character_hp(character_id, max(0, hp - random.randint(1, 19)))
+    else:
+        character_id = database.get_character_id(user_id, character_name)
+        if database.buy_item(character_id, "Minor Healing Potion", "-# Restores 10 HP", 20, 10)[0]:
+            database.sell_item(character_id, "Minor Healing Potion")
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
@@ -0,0 +1,163 @@
+import random
+from array import array
+from collections import Counter
+
+from autocomplete import MAX_CHOICES, fold
+
+# In-memory copy of the enemy and loot tables. The content only changes when
+# content.json is loaded, so the bot loads it once per location and samples from
+# memory instead of running ORDER BY RANDOM() on every /loot and fight.
+
+class AliasTable:
+    """Vose's alias method: O(n) to build, O(1) per weighted draw."""
+
+    __slots__ = ("prob", "alias")
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = sum(weights)
+        self.prob = array("d", [0.0] * n)
+        self.alias = array("I", range(n))
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Whatever is left is 1.0 up to rounding error
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def draw(self, rng=random):
+        i = int(rng.random() * len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+    def draw_many(self, k, rng=random):
+        # k independent draws from one batch of 2k uniforms
+        n = len(self.prob)
+        prob, alias = self.prob, self.alias
+        uniforms = [rng.random() for _ in range(2 * k)]
+        draws = []
+        for j in range(k):
+            i = int(uniforms[2 * j] * n)
+            draws.append(i if uniforms[2 * j + 1] < prob[i] else alias[i])
+        return draws
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TrigramIndex:
+    """Ranked substring search over a fixed list of names.
+
+    Each name is filed under every trigram of its folded form, so a query only
+    looks at names sharing a trigram with it instead of scanning them all.
+    Matches rank exact > prefix > word prefix > substring > near miss (at least
+    half the query's trigrams, which catches most typos), then shorter names first.
+    """
+
+    __slots__ = ("folded", "postings")
+
+    def __init__(self, names):
+        self.folded = tuple(fold(name) for name in names)
+        self.postings = {}
+        for i, text in enumerate(self.folded):
+            for gram in trigrams(text):
+                self.postings.setdefault(gram, []).append(i)
+
+    def search(self, text, limit=MAX_CHOICES):
+        # Positions of the best matches, best first
+        query = fold(text)
+        grams = trigrams(query)
+        if grams:
+            shared = Counter()
+            for gram in grams:
+                shared.update(self.postings.get(gram, ()))
+        else:
+            # Too short to have a trigram; only happens while the user is still typing
+            shared = dict.fromkeys(range(len(self.folded)), 0)
+
+        ranked = []
+        for i, count in shared.items():
+            name = self.folded[i]
+            if name == query:
+                tier = 0
+            elif name.startswith(query):
+                tier = 1
+            elif f" {query}" in f" {name}":
+                tier = 2
+            elif query in name:
+                tier = 3
+            elif count * 2 >= len(grams) > 0:
+                tier = 4
+            else:
+                continue
+            ranked.append((tier, -count, len(name), name, i))
+        ranked.sort()
+        return [entry[-1] for entry in ranked[:limit]]
+
+class LocationCatalog:
+    __slots__ = ("enemies", "enemy_index", "loot", "loot_table")
+
+    def __init__(self, enemies, loot):
+        self.enemies = enemies  # tuple of (name, description)
+        self.enemy_index = TrigramIndex(name for name, _ in enemies)
+        self.loot = tuple(item[:4] for item in loot)  # tuple of (name, description, value, hp_effect)
+        self.loot_table = AliasTable([item[4] for item in loot]) if loot else None  # weighted by drop_rate
+
+class WorldCatalog:
+    def __init__(self):
+        self.locations = {}
+
+    def load(self, conn):
+        enemies = {}
+        for name, description, location in conn.execute("""
+        SELECT t.name, t.description, l.location
+        FROM enemy_locations l
+        JOIN enemy_types t ON t.enemy_id = l.enemy_id
+        ORDER BY t.enemy_id
+        """):
+            enemies.setdefault(location, []).append((name, description))
+
+        loot = {}
+        for name, description, value, hp_effect, drop_rate, location in conn.execute("""
+        SELECT name, description, value, hp_effect, drop_rate, location FROM loot_items ORDER BY id
+        """):
+            if drop_rate is None or drop_rate > 0:
+                loot.setdefault(location, []).append((name, description, value, hp_effect, drop_rate or 1.0))
+
+        # Build everything first, then swap it in so readers never see a half-loaded catalog
+        self.locations = {
+            location: LocationCatalog(tuple(enemies.get(location, ())), tuple(loot.get(location, ())))
+            for location in enemies.keys() | loot.keys()
+        }
+
+    def random_enemy(self, location):
+        entry = self.locations.get(location)
+        if not entry or not entry.enemies:
+            return None
+        return entry.enemies[int(random.random() * len(entry.enemies))]
+
+    def random_loot(self, location):
+        entry = self.locations.get(location)
+        if not entry or not entry.loot_table:
+            return None
+        return entry.loot[entry.loot_table.draw()]
+
+    def random_loot_many(self, location, k):
+        entry = self.locations.get(location)
+        if not entry or not entry.loot_table:
+            return []
+        return [entry.loot[i] for i in entry.loot_table.draw_many(k)]
+
+    def search_enemies(self, location, text, limit=MAX_CHOICES):
+        # [(name, description)] at the location matching text, best match first
+        entry = self.locations.get(location)
+        if not entry:
+            return []
+        return [entry.enemies[i] for i in entry.enemy_index.search(text, limit)]
+
+world = WorldCatalog()
@@ -0,0 +1,92 @@
+"""Monte Carlo balance simulator for EncounterView fights.
+
+Replays the Fight button rules from main.py (d20 vs d20, roll difference as
+damage, level multiplier on player hits, per-location enemy HP and XP) for
+many fights at once with NumPy, and reports per (level, location):
+
+    win %     share of fights the character survives
+    rounds    mean Fight presses per fight, ties included
+    hp lost   mean HP lost per fight
+    xp/hour   expected XP per hour of fighting at --seconds-per-round
+
+    python combat_sim.py --fights 1000000 --levels 0 5 10 15 20
+"""
+import argparse
+import json
+
+try:
+    import numpy as np
+except ImportError:  # Only this offline tool needs NumPy
+    raise SystemExit("combat_sim.py needs NumPy: pip install numpy")
+
+from areas import AREAS, COMBAT_DIE, level_multiplier, max_hp
+
+def simulate(level, location, fights, start_hp=None, max_rounds=10_000, rng=None):
+    rng = rng or np.random.default_rng()
+    area = AREAS[location]
+    min_enemy_hp, max_enemy_hp = area.enemy_hp
+    multiplier = level_multiplier(level)
+    start_hp = max_hp(level) if start_hp is None else start_hp
+
+    enemy_hp = rng.integers(min_enemy_hp, max_enemy_hp, size=fights, endpoint=True)
+    player_hp = np.full(fights, start_hp, dtype=np.int64)
+    rounds = np.zeros(fights, dtype=np.int64)
+    won = np.zeros(fights, dtype=bool)
+
+    # Indices of fights still going; each pass plays one Fight press for all of them
+    active = np.arange(fights)
+    while active.size and rounds[active[0]] < max_rounds:
+        rolls = rng.integers(1, COMBAT_DIE, size=(2, active.size), endpoint=True)
+        diff = rolls[0] - rolls[1]
+        rounds[active] += 1
+
+        hit = diff > 0
+        # int(base_damage * level_multiplier) truncates, same as the bot
+        enemy_hp[active[hit]] -= (diff[hit] * multiplier).astype(np.int64)
+        hurt = diff < 0
+        player_hp[active[hurt]] = np.maximum(0, player_hp[active[hurt]] + diff[hurt])
+
+        won[active] = enemy_hp[active] <= 0
+        active = active[(enemy_hp[active] > 0) & (player_hp[active] > 0)]
+
+    return {
+        "level": level,
+        "location": location,
+        "fights": fights,
+        "win_rate": float(won.mean()),
+        "rounds": float(rounds.mean()),
+        "hp_lost": float((start_hp - player_hp).mean()),
+        "xp_per_fight": float(won.mean() * area.victory_xp),
+        "unfinished": int(active.size),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fights", type=int, default=200_000, help="fights per (level, location)")
+    parser.add_argument("--levels", type=int, nargs="*", default=[0, 5, 10, 15, 20])
+    parser.add_argument("--locations", nargs="*", default=list(AREAS))
+    parser.add_argument("--start-hp", type=int, help="HP at the start of each fight (default: full HP for the level)")
+    parser.add_argument("--seconds-per-round", type=float, default=4.0, help="how long one Fight press takes a player")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    results = []
+    for location in args.locations:
+        for level in args.levels:
+            result = simulate(level, location, args.fights, args.start_hp, rng=rng)
+            result["xp_per_hour"] = result["xp_per_fight"] / (result["rounds"] * args.seconds_per_round) * 3600
+            results.append(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'location':<25} {'level':>5} {'win %':>7} {'rounds':>7} {'hp lost':>8} {'xp/hour':>8}")
+    for r in results:
+        print(f"{r['location']:<25} {r['level']:>5} {r['win_rate'] * 100:>6.1f}% {r['rounds']:>7.2f} "
+              f"{r['hp_lost']:>8.1f} {r['xp_per_hour']:>8.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import hashlib
+import json
+import logging
+import os
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Uploading the command tree is a rate limited global call, so only do it
+# when the commands actually changed. The payload discord.py would send is
+# hashed and the hash of the last successful sync is kept in a small JSON
+# file, keyed by application and scope (global or one guild).
+
+SYNC_STATE_FILE = os.getenv("COMMAND_SYNC_STATE", ".command_sync.json")
+
+def tree_hash(tree, guild=None):
+    # Same payload CommandTree.sync() uploads, in a stable order
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+                     key=lambda command: (command.get("type", 1), command["name"]))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def load_state(path=SYNC_STATE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state, path=SYNC_STATE_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+async def sync_commands(tree, application_id, guild_id=None, force=False, path=SYNC_STATE_FILE):
+    """Sync the tree if it changed since the last sync; returns True if it was uploaded."""
+    guild = discord.Object(id=guild_id) if guild_id else None
+    if guild:
+        # Staging mode: register everything on one guild, where updates show up immediately
+        tree.copy_global_to(guild=guild)
+
+    scope = f"{application_id}:{f'guild:{guild_id}' if guild else 'global'}"
+    digest = tree_hash(tree, guild)
+    state = load_state(path)
+    if not force and state.get(scope) == digest:
+        logger.info("Command tree unchanged (%s), skipping sync", scope)
+        return False
+
+    synced = await tree.sync(guild=guild)
+    logger.info("Synced %d command(s) (%s)", len(synced), scope)
+    state[scope] = digest
+    try:
+        save_state(state, path)
+    except OSError:
+        # Worst case the next boot syncs again
+        logger.exception("Failed to save command sync state to %s", path)
+    return True
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Enemies and loot live in content.json and are loaded into the enemy_types,
+# enemy_locations and loot_items tables in one transaction. The file's hash
+# is stored in content_meta, so loading an unchanged file is a single SELECT
+# and the loader is safe to run on every start.
+
+CONTENT_FILE = os.getenv("CONTENT_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "content.json"))
+
+def read_content(path=CONTENT_FILE):
+    with open(path, "rb") as f:
+        raw = f.read()
+    return hashlib.sha256(raw).hexdigest(), json.loads(raw)
+
+def enemy_rows(data):
+    enemies = [(enemy["name"], enemy["description"]) for enemy in data["enemies"]]
+    locations = [
+        (location, enemy["name"], level_min, level_max)
+        for enemy in data["enemies"]
+        for location, (level_min, level_max) in enemy["locations"].items()
+    ]
+    return enemies, locations
+
+def loot_rows(data):
+    return [
+        (location, item["name"], item["description"], item["value"], item.get("hp_effect", 0), item.get("drop_rate", 1.0))
+        for location, items in data["loot"].items()
+        for item in items
+    ]
+
+def load_content(conn, path=CONTENT_FILE, force=False):
+    """Load the content file unless it is unchanged since the last load; returns True if it loaded."""
+    digest, data = read_content(path)
+    row = conn.execute("SELECT value FROM content_meta WHERE key = 'content_hash'").fetchone()
+    if not force and row and row[0] == digest:
+        logger.info("Content unchanged, skipping load")
+        return False
+
+    enemies, locations = enemy_rows(data)
+    loot = loot_rows(data)
+
+    # The file is the source of truth: rows missing from it are removed
+    conn.execute("BEGIN")
+    try:
+        conn.executemany("""
+        INSERT INTO enemy_types (name, description) VALUES (?, ?)
+        ON CONFLICT (name) DO UPDATE SET description = excluded.description
+        """, enemies)
+        conn.execute("DELETE FROM enemy_locations")
+        conn.executemany("""
+        INSERT INTO enemy_locations (location, enemy_id, level_min, level_max)
+        SELECT ?, enemy_id, ?, ? FROM enemy_types WHERE name = ?
+        """, [(location, level_min, level_max, name) for location, name, level_min, level_max in locations])
+        conn.execute("DELETE FROM enemy_types WHERE enemy_id NOT IN (SELECT enemy_id FROM enemy_locations)")
+
+        conn.execute("DELETE FROM loot_items")
+        conn.executemany("""
+        INSERT INTO loot_items (location, name, description, value, hp_effect, drop_rate)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """, loot)
+
+        conn.execute("""
+        INSERT INTO content_meta (key, value) VALUES ('content_hash', ?)
+        ON CONFLICT (key) DO UPDATE SET value = excluded.value
+        """, (digest,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    logger.info("Loaded %d enemies in %d locations and %d loot items", len(enemies), len(locations), len(loot))
+    return True
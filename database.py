@@ -1,231 +1,712 @@
+import asyncio
+import functools
+import json
+import os
 import sqlite3
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client
 
-DB_NAME = "game_database.db"
+import metrics
+from catalog import world
+from autocomplete import Completions
+from content import CONTENT_FILE, load_content
+from eventlog import EventLog
+from leaderboard import Leaderboards
+from migrations import migrate
+from writebehind import WriteBehindBuffer
 
-def connect():
-    return sqlite3.connect(DB_NAME)
+DB_NAME = os.getenv("DB_PATH", "game_database.db")
 
-def setup_database():
-    conn = connect()
-    cursor = conn.cursor()
-
-    # Table for character profiles
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS profiles (
-        character_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER,
-        character_name TEXT,
-        nickname TEXT,
-        hp INTEGER,
-        level INTEGER DEFAULT 0,
-        xp INTEGER DEFAULT 0,
-        weapon TEXT,
-        active_location TEXT,
-        gp INTEGER DEFAULT 0
-    )
-    """)
-
-    # Add nickname column if it doesn't exist
-    cursor.execute("""
-    SELECT name FROM pragma_table_info('profiles') WHERE name='nickname'
-    """)
-    if not cursor.fetchone():
-        cursor.execute("""
-        ALTER TABLE profiles ADD COLUMN nickname TEXT
-        """)
-
-    # Add gp column if it doesn't exist
-    cursor.execute("""
-    SELECT name FROM pragma_table_info('profiles') WHERE name='gp'
-    """)
-    if not cursor.fetchone():
-        cursor.execute("""
-        ALTER TABLE profiles ADD COLUMN gp INTEGER DEFAULT 0
-        """)
-
-    # Table for character inventories
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS inventory (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        character_id INTEGER,
-        item_name TEXT,
-        description TEXT,
-        value INTEGER,
-        hp_effect INTEGER,
-        FOREIGN KEY (character_id) REFERENCES profiles(character_id)
-    )
-    """)
-
-    # Table for enemies
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS enemies (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        description TEXT,
-        level_min INTEGER,
-        level_max INTEGER,
-        location TEXT
-    )
-    """)
-
-    # Table for loot items
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS loot_items (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        description TEXT,
-        value INTEGER,
-        hp_effect INTEGER,
-        drop_rate REAL,
-        location TEXT
-    )
-    """)
-
-    # Table for enemies
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS enemies (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        description TEXT,
-        level_min INTEGER,
-        level_max INTEGER,
-        location TEXT
-    )
-    """)
-
-    # Table for loot items
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS loot_items (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        description TEXT,
-        value INTEGER,
-        hp_effect INTEGER,
-        drop_rate REAL, 
-        location TEXT
-    )
-    """)
+# Named pragma sets applied to every new connection (pick one with STORAGE_PROFILE)
+STORAGE_PROFILES = {
+    # Every commit is fsync'd before returning; nothing is lost on power failure
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -8000,  # Negative values are KiB
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    # WAL + NORMAL only fsyncs at checkpoints; a crash can drop the last few commits but never corrupts
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -32000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # No fsync at all; the OS decides when data reaches disk
+    "throughput": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -128000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+}
+STORAGE_PROFILE = os.getenv("STORAGE_PROFILE", "balanced")
 
-    conn.commit()
-    conn.close()
+# Durability bounds for buffered HP/XP/GP/inventory changes: at most this many
+# seconds or this many mutations can be lost on a crash. 0 writes through.
+WRITE_BEHIND_INTERVAL = float(os.getenv("WRITE_BEHIND_INTERVAL", "2.0"))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "500"))
 
-def add_enemy(name, description, level_min, level_max, location):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-    INSERT INTO enemies (name, description, level_min, level_max, location)
-    VALUES (?, ?, ?, ?, ?)
-    """, (name, description, level_min, level_max, location))
-    conn.commit()
-    conn.close()
+# Passive regeneration: one HP per HP_REGEN_SECONDS below max HP (0 turns it off). It is
+# never written on its own; reads derive it from hp_updated_at and the next real change
+# to the character stores it along with everything else.
+HP_REGEN_SECONDS = float(os.getenv("HP_REGEN_SECONDS", "60"))
+
+# Sharded deployments run one storage process (storage.py) that owns the
+# database; shard workers set STORAGE_ADDRESS and send their helper calls
+# there instead of opening their own write connection
+STORAGE_ADDRESS = os.getenv("STORAGE_ADDRESS")
+STORAGE_AUTHKEY = os.getenv("STORAGE_AUTHKEY", "").encode()
+# Helpers that only touch this process's own state, so workers run them locally.
+# The autocomplete helpers are deliberately not among them: a worker's own index
+# would miss every change made through the storage process
+LOCAL_FUNCTIONS = {"refresh_catalog", "close_connection", "flush_pending"}
+
+def parse_address(address):
+    # "host:port" for TCP, anything else is a Unix socket path
+    host, _, port = address.rpartition(":")
+    return (host, int(port)) if host and port.isdigit() else address
+
+# Every query runs on this one thread so the event loop never waits on disk I/O
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="database")
+_local = threading.local()
+
+# Item catalog cache: (name, value, hp_effect) -> item_id, and item_id -> (name, description, value, hp_effect)
+_item_ids = {}
+_item_details = {}
+pending = WriteBehindBuffer(WRITE_BEHIND_MAX_PENDING if WRITE_BEHIND_INTERVAL > 0 else 0)
+# Rankings kept current from the same mutations the buffer sees, so /leaderboard never scans profiles
+leaderboards = Leaderboards()
+pending.on_change = lambda character_id, state: leaderboards.update(
+    character_id, state.level, total_xp(state.level, state.xp), state.gp)
+# Names for app command autocomplete, kept current by the helpers below
+completions = Completions()
+
+def regenerate(hp, level, hp_updated_at, now):
+    # (hp, hp_updated_at) as of now; progress toward the next point carries over
+    max_hp = 100 + (level * 10)  # Base HP + (level * 10)
+    if hp >= max_hp or HP_REGEN_SECONDS <= 0 or hp_updated_at is None:
+        # Nothing to regain, so the clock starts over when HP next drops
+        return hp, now
+    gained = max(0, int((now - hp_updated_at) // HP_REGEN_SECONDS))
+    if hp + gained >= max_hp:
+        return max_hp, now
+    return hp + gained, hp_updated_at + gained * HP_REGEN_SECONDS
+
+def current_hp(hp, level, hp_updated_at):
+    return regenerate(hp, level, hp_updated_at, time.time())[0]
+
+pending.regenerate = regenerate
+# Append-only record of every change; buffered ones are written by the flush that stores them
+events = pending.log = EventLog()
+
+def connect(profile=None):
+    profile = profile or STORAGE_PROFILE
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile {profile!r}, expected one of: {', '.join(STORAGE_PROFILES)}")
 
-def add_loot_item(name, description, value, hp_effect, drop_rate, location):
+    conn = sqlite3.connect(DB_NAME, timeout=STORAGE_PROFILES[profile]["busy_timeout"] / 1000)
+    for pragma, value in STORAGE_PROFILES[profile].items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    return conn
+
+def get_connection():
+    # Long-lived connection owned by the calling thread (normally the DB thread)
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = connect()
+        conn.set_trace_callback(metrics.count_query)
+        _local.conn = conn
+    return conn
+
+def close_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+    storage = getattr(_local, "storage", None)
+    if storage is not None:
+        storage.close()
+        _local.storage = None
+    # Cached item ids belong to the database that was just closed
+    _item_ids.clear()
+    _item_details.clear()
+
+async def run(func, *args, **kwargs):
+    """Run a blocking database helper on the DB thread and await its result."""
+    loop = asyncio.get_running_loop()
+    if STORAGE_ADDRESS and func.__module__ == __name__ and func.__name__ not in LOCAL_FUNCTIONS:
+        call = functools.partial(_remote_call, func.__name__, args, kwargs)
+    else:
+        call = functools.partial(func, *args, **kwargs)
+    # DB time and queries are charged to the command awaiting them
+    return await loop.run_in_executor(_executor, metrics.timed_db_call, metrics.current_call.get(), call)
+
+def call(func, *args, **kwargs):
+    # Blocking counterpart of run() for code outside the event loop (storage.py)
+    return _executor.submit(func, *args, **kwargs).result()
+
+def _remote_call(name, args, kwargs):
+    # Runs on the DB thread, so each worker has one request in flight on one connection
+    storage = getattr(_local, "storage", None)
+    if storage is None:
+        storage = _local.storage = Client(parse_address(STORAGE_ADDRESS), authkey=STORAGE_AUTHKEY)
+    try:
+        storage.send((name, args, kwargs))
+        ok, result = storage.recv()
+    except (OSError, EOFError):
+        # Reconnect on the next call, e.g. after the storage process restarted
+        storage.close()
+        _local.storage = None
+        raise
+    if not ok:
+        raise result
+    return result
+
+def flush_pending():
+    if not pending.characters and not pending.encounters and not pending.expeditions:
+        return 0
+    return pending.flush(get_connection())
+
+def shutdown():
+    # Write out anything still buffered, close the DB thread's connection and stop the executor
+    _executor.submit(flush_pending).result()
+    _executor.submit(close_connection).result()
+    _executor.shutdown(wait=True)
+
+def setup_database():
     conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-    INSERT INTO loot_items (name, description, value, hp_effect, drop_rate, location)
-    VALUES (?, ?, ?, ?, ?, ?)
-    """, (name, description, value, hp_effect, drop_rate, location))
-    conn.commit()
-    conn.close()
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
+
+def refresh_catalog():
+    # Reload the in-memory enemy/loot catalog; call after content tables change
+    world.load(get_connection())
+
+def seed_content(path=CONTENT_FILE, force=False):
+    # Bulk-load content.json; a no-op when it hasn't changed since the last load
+    return load_content(get_connection(), path, force)
 
 def set_active_location(user_id, character_name, location):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-    UPDATE profiles
-    SET active_location = ?
-    WHERE user_id = ? AND character_name = ?
-    """, (location, user_id, character_name))
+    conn = get_connection()
+    character_id = get_character_id(user_id, character_name)
+    if character_id is None:
+        return
+    conn.execute("UPDATE profiles SET active_location = ? WHERE character_id = ?", (location, character_id))
+    events.append(conn, character_id, "moved", {"location": location})
     conn.commit()
-    conn.close()
+    completions.move_character(user_id, character_name, location)
 
 def get_active_location(user_id, character_name):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
+    cursor = get_connection().execute("""
     SELECT active_location FROM profiles
     WHERE user_id = ? AND character_name = ?
     """, (user_id, character_name))
     location = cursor.fetchone()
-    conn.close()
     return location[0] if location else None
 
-def add_item_to_inventory(character_id, item_name, description, value, hp_effect):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-    INSERT INTO inventory (character_id, item_name, description, value, hp_effect)
-    VALUES (?, ?, ?, ?, ?)
-    """, (character_id, item_name, description, value, hp_effect))
-    conn.commit()
-    conn.close()
+def get_item_id(name, description, value, hp_effect):
+    # Items are identified by name, value and HP effect; the first description seen is kept
+    key = (name, value or 0, hp_effect or 0)
+    item_id = _item_ids.get(key)
+    if item_id is None:
+        conn = get_connection()
+        conn.execute("""
+        INSERT OR IGNORE INTO items (name, description, value, hp_effect)
+        VALUES (?, ?, ?, ?)
+        """, (name, description, *key[1:]))
+        conn.commit()
+        item_id, description = conn.execute("""
+        SELECT item_id, description FROM items
+        WHERE name = ? AND value = ? AND hp_effect = ?
+        """, key).fetchone()
+        _item_ids[key] = item_id
+        _item_details[item_id] = (name, description, *key[1:])
+    return item_id
+
+def add_item_to_inventory(character_id, item_name, description, value, hp_effect, quantity=1):
+    conn = get_connection()
+    state = pending.load(conn, character_id)
+    _change_items(character_id, state, get_item_id(item_name, description, value, hp_effect), quantity)
+    pending.touched(conn, "item_added")
+
+def _change_items(character_id, state, item_id, quantity):
+    # Every inventory change goes through here so the autocomplete index follows it
+    state.items[item_id] += quantity
+    completions.item_changed(character_id, _item_details[item_id][0], quantity)
 
 def get_item_from_inventory(character_id, item_name):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-    SELECT id, item_name, description, value, hp_effect FROM inventory
-    WHERE character_id = ? AND item_name = ?
-    """, (character_id, item_name))
-    item = cursor.fetchone()
-    conn.close()
-    return item
+    item_id = _find_item(character_id, item_name)
+    if item_id is None:
+        return None
+    return (item_id, *_item_details[item_id])
 
 def update_character_hp(character_id, hp_increase):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-    UPDATE profiles
-    SET hp = hp + ?
+    conn = get_connection()
+    state = pending.load(conn, character_id)
+    state.hp += hp_increase
+    pending.touched(conn, "hp_changed")
+
+def remove_item_from_inventory(character_id, item_id, quantity=1):
+    conn = get_connection()
+    _change_items(character_id, pending.load(conn, character_id), item_id, -quantity)
+    pending.touched(conn, "item_removed")
+
+MAX_LEVEL = 20
+
+# Level n -> n + 1 costs 100 * (n + 1) * 1.5 XP, so reaching level n from 0 takes 75 * n * (n + 1) in total
+XP_THRESHOLDS = tuple(75 * level * (level + 1) for level in range(MAX_LEVEL + 1))
+
+def total_xp(level, xp):
+    # XP earned since level 0 (set_level can put a character outside 0..MAX_LEVEL)
+    return XP_THRESHOLDS[max(0, min(level, MAX_LEVEL))] + xp
+
+def apply_xp(level, xp, hp, xp_gain):
+    # Stored XP is progress within the current level; past the cap it just accumulates
+    if level >= MAX_LEVEL:
+        return level, xp + xp_gain, hp
+
+    total_xp = XP_THRESHOLDS[level] + xp + xp_gain
+    new_level = min(MAX_LEVEL, bisect_right(XP_THRESHOLDS, total_xp) - 1)
+    if new_level > level:
+        # +10 HP per level gained, capped at the new max HP
+        hp = min(100 + (new_level * 10), hp + 10 * (new_level - level))
+    return new_level, total_xp - XP_THRESHOLDS[new_level], hp
+
+def update_character_xp(character_name: str, xp_gain: int):
+    conn = get_connection()
+    state = pending.load(conn, _character_id_by_name(character_name))
+    current_level = state.level
+    state.level, state.xp, state.hp = apply_xp(state.level, state.xp, state.hp, xp_gain)
+    pending.touched(conn, "xp_gained")
+    return state.level > current_level
+
+def resolve_victory(character_id, xp_gain, loot=None):
+    # XP, level, HP and loot for a won fight, applied to the character's pending state in one step.
+    # They reach the table together in the next write-behind transaction.
+    conn = get_connection()
+    state = pending.load(conn, character_id)
+    current_level = state.level
+    state.level, state.xp, state.hp = apply_xp(state.level, state.xp, state.hp, xp_gain)
+    if loot:
+        _change_items(character_id, state, get_item_id(*loot[:4]), 1)
+    pending.touched(conn, "fight_won")
+    return state.level > current_level
+
+# Command helpers: each one is a single unit of work run on the DB thread via run().
+# Reads overlay whatever is still waiting in the write-behind buffer.
+
+def _character_id_by_name(character_name):
+    row = get_connection().execute("SELECT character_id FROM profiles WHERE character_name = ?", (character_name,)).fetchone()
+    return row[0] if row else None
+
+def _inventory(character_id):
+    # item_id -> quantity, including buffered adds/removes, from one read of the character's stacks
+    items = Counter()
+    for item_id, name, description, value, hp_effect, quantity in get_connection().execute("""
+    SELECT inv.item_id, items.name, items.description, items.value, items.hp_effect, inv.quantity
+    FROM inventory inv
+    JOIN items USING (item_id)
+    WHERE inv.character_id = ? AND inv.quantity > 0
+    ORDER BY inv.item_id
+    """, (character_id,)):
+        items[item_id] = quantity
+        _item_details[item_id] = (name, description, value, hp_effect)
+    state = pending.get(character_id)
+    if state is not None:
+        items.update(state.items)
+    return +items  # Drop anything buffered down to zero
+
+def _find_item(character_id, item_name, healing_only=False):
+    for item_id in _inventory(character_id):
+        name, _, _, hp_effect = _item_details[item_id]
+        if name == item_name and (not healing_only or hp_effect > 0):
+            return item_id
+    return None
+
+def get_character_id(user_id, character_name):
+    cursor = get_connection().execute("""
+    SELECT character_id FROM profiles
+    WHERE user_id = ? AND character_name = ?
+    """, (user_id, character_name))
+    character = cursor.fetchone()
+    return character[0] if character else None
+
+def create_character(user_id, character_name):
+    conn = get_connection()
+    try:
+        cursor = conn.execute("""
+        INSERT INTO profiles (user_id, character_name, hp, level, gp, hp_updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """, (user_id, character_name, 100, 0, 200, time.time()))
+    except sqlite3.IntegrityError:
+        # Character names are unique
+        conn.rollback()
+        return False
+    events.append(conn, cursor.lastrowid, "character_created", {
+        "user_id": user_id, "name": character_name, "level": 0, "xp": 0, "hp": 100, "gp": 200})
+    conn.commit()
+    leaderboards.add(cursor.lastrowid, character_name, 0, 0, 200)
+    completions.add_character(cursor.lastrowid, user_id, character_name)
+    return True
+
+def delete_character(user_id, character_name):
+    # The deleted character's id, or None if the user has no such character
+    conn = get_connection()
+    character_id = get_character_id(user_id, character_name)
+    if character_id is None:
+        return None
+
+    pending.discard(character_id)
+    conn.execute("DELETE FROM inventory WHERE character_id = ?", (character_id,))
+    conn.execute("DELETE FROM expeditions WHERE character_id = ?", (character_id,))
+    conn.execute("DELETE FROM encounters WHERE character_id = ?", (character_id,))
+    conn.execute("DELETE FROM profiles WHERE character_id = ?", (character_id,))
+    conn.execute("DELETE FROM snapshots WHERE character_id = ?", (character_id,))
+    events.append(conn, character_id, "character_deleted", {})
+    conn.commit()
+    leaderboards.remove(character_id)
+    completions.remove_character(character_id)
+    return character_id
+
+def list_characters(user_id):
+    cursor = get_connection().execute("""
+    SELECT character_name, hp, level, nickname, character_id, hp_updated_at FROM profiles
+    WHERE user_id = ?
+    """, (user_id,))
+    characters = []
+    for name, hp, level, nickname, character_id, hp_updated_at in cursor:
+        state = pending.get(character_id)
+        if state is not None:
+            hp, level, hp_updated_at = state.hp, state.level, state.hp_updated_at
+        characters.append((name, current_hp(hp, level, hp_updated_at), level, nickname))
+    characters.sort(key=lambda char: char[2], reverse=True)
+    return characters
+
+def get_profile(user_id, character_name):
+    cursor = get_connection().execute("""
+    SELECT p.character_name, p.hp, p.level, p.active_location, p.character_id, p.xp, p.nickname, p.gp, p.hp_updated_at
+    FROM profiles p
+    WHERE p.user_id = ? AND p.character_name = ?
+    """, (user_id, character_name))
+    row = cursor.fetchone()
+    if not row:
+        return None
+
+    name, hp, level, location, character_id, xp, nickname, gp, hp_updated_at = row
+    state = pending.get(character_id)
+    if state is not None:
+        hp, level, xp, gp, hp_updated_at = state.hp, state.level, state.xp, state.gp, state.hp_updated_at
+    character = (name, current_hp(hp, level, hp_updated_at), level, location, character_id, xp, nickname, gp)
+
+    # (name, description, value, hp_effect, quantity) per stack
+    items = [(*_item_details[item_id], quantity) for item_id, quantity in _inventory(character[4]).items()]
+    return character, items
+
+def get_character_level(user_id, character_name):
+    cursor = get_connection().execute("""
+    SELECT character_name, level, character_id FROM profiles
+    WHERE user_id = ? AND character_name = ?
+    """, (user_id, character_name))
+    character = cursor.fetchone()
+    if not character:
+        return None
+    state = pending.get(character[2])
+    return character[0], state.level if state is not None else character[1]
+
+def get_character_location(user_id, character_name):
+    cursor = get_connection().execute("""
+    SELECT character_name, active_location FROM profiles
+    WHERE user_id = ? AND character_name = ?
+    """, (user_id, character_name))
+    return cursor.fetchone()
+
+def get_combat_stats(character_id):
+    # (level, hp, active location), or None if the character was deleted
+    row = get_connection().execute("""
+    SELECT level, hp, active_location, hp_updated_at FROM profiles
     WHERE character_id = ?
-    """, (hp_increase, character_id))
+    """, (character_id,)).fetchone()
+    if row is None:
+        return None
+    level, hp, location, hp_updated_at = row
+    state = pending.get(character_id)
+    if state is not None:
+        level, hp, hp_updated_at = state.level, state.hp, state.hp_updated_at
+    return level, current_hp(hp, level, hp_updated_at), location
+
+def set_character_hp(character_id, hp):
+    conn = get_connection()
+    state = pending.load(conn, character_id)
+    if state is None:
+        return False
+    event = "damage_taken" if hp < state.hp else "hp_set"
+    state.hp = hp
+    pending.touched(conn, event)
+    return True
+
+def damage_character(character_id, damage):
+    # Relative to the buffered HP, so a heal that lands while a fight round is in flight isn't
+    # overwritten. The new HP, or None if the character was deleted
+    conn = get_connection()
+    state = pending.load(conn, character_id)
+    if state is None:
+        return None
+    state.hp = max(0, state.hp - damage)
+    pending.touched(conn, "damage_taken")
+    return state.hp
+
+def heal_character(character_id, amount):
+    conn = get_connection()
+    state = pending.load(conn, character_id)
+    max_hp = 100 + (state.level * 10)  # Base HP + (level * 10)
+    state.hp = min(max_hp, state.hp + amount)  # Cap HP at max_hp
+    pending.touched(conn, "healed")
+    return state.hp
+
+def add_loot_to_character(character_name, loot):
+    character_id = _character_id_by_name(character_name)
+    add_item_to_inventory(character_id, loot[0], loot[1], loot[2], loot[3])
+
+def collect_loot(character_name, loot, xp_per_item):
+    # A whole /loot batch in one step: the items and the XP for all of them land in the
+    # character's pending state together, so one write-behind transaction stores the lot
+    conn = get_connection()
+    character_id = _character_id_by_name(character_name)
+    state = pending.load(conn, character_id)
+    for item in loot:
+        _change_items(character_id, state, get_item_id(*item[:4]), 1)
+    current_level = state.level
+    state.level, state.xp, state.hp = apply_xp(state.level, state.xp, state.hp, xp_per_item * len(loot))
+    pending.touched(conn, "loot_gained")
+    return state.level > current_level
+
+def buy_item(character_id, item_name, description, price, hp_effect):
+    conn = get_connection()
+    state = pending.load(conn, character_id)
+
+    # Check if player has enough GP
+    if state.gp < price:
+        return False, state.gp
+
+    # Subtract GP and add item to inventory
+    state.gp -= price
+    _change_items(character_id, state, get_item_id(item_name, description, price, hp_effect), 1)
+    pending.touched(conn, "item_bought")
+    return True, state.gp
+
+def sell_item(character_id, item_name):
+    conn = get_connection()
+    item_id = _find_item(character_id, item_name)
+    if item_id is None:
+        return None
+
+    # Add full value as GP and remove the item
+    value = _item_details[item_id][2]
+    state = pending.load(conn, character_id)
+    state.gp += value
+    _change_items(character_id, state, item_id, -1)
+    pending.touched(conn, "item_sold")
+    return value
+
+def remove_item(character_id, item_name):
+    conn = get_connection()
+    item_id = _find_item(character_id, item_name)
+    if item_id is None:
+        return False
+
+    _change_items(character_id, pending.load(conn, character_id), item_id, -1)
+    pending.touched(conn, "item_discarded")
+    return True
+
+def use_healing_item(character_id, item_name):
+    conn = get_connection()
+
+    # Get the item with hp_effect > 0
+    item_id = _find_item(character_id, item_name, healing_only=True)
+    if item_id is None:
+        return None
+
+    item_name, _, _, hp_effect = _item_details[item_id]
+    state = pending.load(conn, character_id)
+    max_hp = 100 + (state.level * 10)  # Base HP + (level * 10)
+    state.hp = min(max_hp, state.hp + hp_effect)  # Cap HP at max_hp
+    _change_items(character_id, state, item_id, -1)
+    pending.touched(conn, "healing_item_used")
+    return item_name, hp_effect, state.hp
+
+def set_level(character_id, level):
+    conn = get_connection()
+    pending.load(conn, character_id).level = level
+    pending.touched(conn, "level_set")
+
+def rename_character(character_id, new_name):
+    conn = get_connection()
+    try:
+        conn.execute("UPDATE profiles SET character_name = ? WHERE character_id = ?", (new_name, character_id))
+    except sqlite3.IntegrityError:
+        # The new name is already taken
+        conn.rollback()
+        return False
+    events.append(conn, character_id, "character_renamed", {"name": new_name})
     conn.commit()
-    conn.close()
+    leaderboards.rename(character_id, new_name)
+    completions.rename_character(character_id, new_name)
+    return True
 
-def remove_item_from_inventory(item_id):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-    DELETE FROM inventory
-    WHERE id = ?
-    """, (item_id,))
+def set_nickname(character_id, nickname):
+    conn = get_connection()
+    conn.execute("UPDATE profiles SET nickname = ? WHERE character_id = ?", (nickname, character_id))
+    events.append(conn, character_id, "nickname_set", {"nickname": nickname})
     conn.commit()
-    conn.close()
 
-def update_character_xp(character_name: str, xp_gain: int):
-    conn = connect()
-    cursor = conn.cursor()
-
-    # Get current XP, level and HP
-    cursor.execute("""
-    SELECT level, xp, hp FROM profiles 
-    WHERE character_name = ?
-    """, (character_name,))
-    current_level, current_xp, current_hp = cursor.fetchone()
-
-    # Calculate XP needed for next level (increases exponentially)
-    xp_for_next_level = 100 * (current_level + 1) * 1.5
-
-    # Add new XP
-    new_xp = current_xp + xp_gain
-    new_level = current_level
-    new_hp = current_hp
-
-    # Check if leveled up
-    while new_xp >= xp_for_next_level and new_level < 20:
-        new_level += 1
-        new_xp -= xp_for_next_level
-        xp_for_next_level = 100 * (new_level + 1) * 1.5
-        new_hp = min(100 + (new_level * 10), new_hp + 10)  # Increase max HP by 10 per level
-
-    # Update character
-    cursor.execute("""
-    UPDATE profiles 
-    SET level = ?, xp = ?, hp = ?
-    WHERE character_name = ?
-    """, (new_level, new_xp, new_hp, character_name))
+def save_encounter(row):
+    # Buffered like HP changes, so a fight round costs no extra commit
+    pending.save_encounter(get_connection(), row)
+
+def end_encounters(encounter_ids):
+    conn = get_connection()
+    for encounter_id in encounter_ids:
+        pending.delete_encounter(conn, encounter_id)
 
+def load_encounters(now, limit):
+    # Unexpired fights to restore after a restart, most recently active first
+    conn = get_connection()
+    flush_pending()
+    conn.execute("DELETE FROM encounters WHERE expires_at <= ?", (now,))
     conn.commit()
-    conn.close()
-    return new_level > current_level
\ No newline at end of file
+    return conn.execute("""
+    SELECT encounter_id, character_id, character_name, enemy_name, enemy_description,
+           location, char_level, enemy_hp, max_enemy_hp, combat_round, expires_at
+    FROM encounters
+    ORDER BY expires_at DESC
+    LIMIT ?
+    """, (limit,)).fetchall()
+
+def load_leaderboards():
+    # The one full scan of profiles; after this the boards are updated in place
+    if leaderboards.loaded:
+        return
+    rows = []
+    for character_id, name, level, xp, gp in get_connection().execute(
+            "SELECT character_id, character_name, level, xp, gp FROM profiles"):
+        state = pending.get(character_id)
+        if state is not None:
+            level, xp, gp = state.level, state.xp, state.gp
+        rows.append((character_id, name, level, total_xp(level, xp), gp))
+    leaderboards.load(rows)
+
+def get_leaderboard(board, limit, user_id, character_name=None):
+    # Top `limit` rows plus (name, rank, out of) for the named character, or the user's best ranked one
+    load_leaderboards()
+    if character_name is not None:
+        character_ids = [get_character_id(user_id, character_name)]
+    else:
+        character_ids = [row[0] for row in get_connection().execute(
+            "SELECT character_id FROM profiles WHERE user_id = ?", (user_id,))]
+    ranks = [(leaderboards.rank(board, character_id), character_id) for character_id in character_ids]
+    ranks = [(rank, character_id) for rank, character_id in ranks if rank is not None]
+    own = None
+    if ranks:
+        (rank, out_of), character_id = min(ranks)
+        own = (leaderboards.characters[character_id][0], rank, out_of)
+    return leaderboards.top(board, limit), own
+
+def load_completions():
+    # One pass over profiles and inventory; autocomplete is answered from memory after this
+    if completions.loaded:
+        return
+    conn = get_connection()
+    characters = conn.execute("SELECT character_id, user_id, character_name, active_location FROM profiles").fetchall()
+    items = conn.execute("""
+    SELECT inv.character_id, items.name, inv.quantity
+    FROM inventory inv
+    JOIN items USING (item_id)
+    WHERE inv.quantity > 0
+    """).fetchall()
+    # Overlay buffered adds/removes that haven't been flushed yet
+    for character_id, state in pending.characters.items():
+        items.extend((character_id, _item_details[item_id][0], quantity)
+                     for item_id, quantity in state.items.items() if quantity)
+    completions.load(characters, items)
+
+def complete_character_names(user_id, text):
+    load_completions()
+    return completions.character_names(user_id, text)
+
+def complete_item_names(user_id, character_name, text):
+    load_completions()
+    return completions.item_names(user_id, character_name, text)
+
+def completion_location(user_id, character_name):
+    # The character's current location, for completing enemy names from the bot's own catalog
+    load_completions()
+    return completions.location(user_id, character_name)
+
+def start_expedition(user_id, character_name, location, channel_id, started_at, due_at, loot, xp):
+    # loot: the (name, description, value, hp_effect) items the expedition will bring back.
+    # Returns (True, due_at), (False, due_at of the expedition already under way), or (False, None)
+    # if the user has no such character
+    conn = get_connection()
+    character_id = get_character_id(user_id, character_name)
+    if character_id is None:
+        return False, None
+    row = conn.execute("SELECT due_at FROM expeditions WHERE character_id = ?", (character_id,)).fetchone()
+    if row and character_id not in pending.expeditions:
+        return False, row[0]
+
+    quantities = Counter(get_item_id(*item[:4]) for item in loot)
+    conn.execute("""
+    INSERT OR REPLACE INTO expeditions (character_id, location, channel_id, started_at, due_at, xp, loot)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (character_id, location, channel_id, started_at, due_at, xp, json.dumps(sorted(quantities.items()))))
+    conn.commit()
+    pending.expeditions.discard(character_id)  # Its old row was just replaced
+    return True, due_at
+
+def resolve_expeditions(now, limit):
+    # Rewards for up to `limit` expeditions that are due, oldest first, written in one transaction.
+    # Returns (user_id, character_name, location, channel_id, xp, [(item name, quantity)], leveled_up)
+    conn = get_connection()
+    rows = conn.execute("""
+    SELECT e.character_id, p.user_id, p.character_name, e.location, e.channel_id, e.xp, e.loot
+    FROM expeditions e
+    JOIN profiles p USING (character_id)
+    WHERE e.due_at <= ?
+    ORDER BY e.due_at
+    LIMIT ?
+    """, (now, limit + len(pending.expeditions))).fetchall()
+
+    results = []
+    for character_id, user_id, character_name, location, channel_id, xp, loot in rows:
+        if character_id in pending.expeditions or len(results) >= limit:
+            continue  # Already resolved, waiting for its flush
+        state = pending.load(conn, character_id)
+        items = []
+        for item_id, quantity in json.loads(loot):
+            if item_id not in _item_details:
+                _item_details[item_id] = conn.execute(
+                    "SELECT name, description, value, hp_effect FROM items WHERE item_id = ?", (item_id,)).fetchone()
+            _change_items(character_id, state, item_id, quantity)
+            items.append((_item_details[item_id][0], quantity))
+        current_level = state.level
+        state.level, state.xp, state.hp = apply_xp(state.level, state.xp, state.hp, xp)
+        pending.finish_expedition(conn, character_id)
+        results.append((user_id, character_name, location, channel_id, xp, items, state.level > current_level))
+
+    # Only report expeditions once their rewards are stored
+    flush_pending()
+    return results
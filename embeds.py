@@ -0,0 +1,32 @@
+# Cache for embeds whose content only depends on static bot data (shop items,
+# area descriptions and images, the command list). Each one is built by its
+# registered builder on first use and every caller gets a shallow copy of it,
+# so one that changes anything (e.g. a per-character title) can't alter the
+# cached embed. Call invalidate() whenever the data a builder reads from
+# changes, or pass that data as the key.
+
+class EmbedCache:
+    def __init__(self):
+        self.builders = {}
+        self.embeds = {}
+
+    def register(self, name):
+        # Decorator: builder(key) -> discord.Embed, key is None for one-off embeds
+        def decorator(builder):
+            self.builders[name] = builder
+            return builder
+        return decorator
+
+    def get(self, name, key=None):
+        embed = self.embeds.get((name, key))
+        if embed is None:
+            embed = self.embeds[(name, key)] = self.builders[name](key)
+        return embed.copy()
+
+    def invalidate(self, *names):
+        # No names drops everything
+        if not names:
+            self.embeds.clear()
+            return
+        for cache_key in [k for k in self.embeds if k[0] in names]:
+            del self.embeds[cache_key]
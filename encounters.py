@@ -0,0 +1,106 @@
+import os
+import random
+import secrets
+import time
+from collections import OrderedDict
+
+from areas import area_for
+
+# Fights in progress. Each one is a compact Encounter record keyed by a random
+# id that is also baked into its buttons' custom_ids, so a restarted bot can
+# re-register the views and pick up where the fight left off. The store is
+# bounded two ways: entries expire ENCOUNTER_TTL seconds after their last
+# button press, and past MAX_ENCOUNTERS the least recently used one is dropped.
+
+ENCOUNTER_TTL = float(os.getenv("ENCOUNTER_TTL", "900"))
+MAX_ENCOUNTERS = int(os.getenv("MAX_ENCOUNTERS", "5000"))
+
+class Encounter:
+    __slots__ = (
+        "encounter_id", "character_id", "character_name", "enemy_name", "enemy_description",
+        "location", "char_level", "enemy_hp", "max_enemy_hp", "combat_round", "expires_at",
+        "view",  # The live EncounterView, not persisted
+    )
+
+    def __init__(self, encounter_id, character_id, character_name, enemy_name, enemy_description,
+                 location, char_level, enemy_hp, max_enemy_hp, combat_round=1, expires_at=0.0):
+        self.encounter_id = encounter_id
+        self.character_id = character_id
+        self.character_name = character_name
+        self.enemy_name = enemy_name
+        self.enemy_description = enemy_description
+        self.location = location
+        self.char_level = char_level
+        self.enemy_hp = enemy_hp
+        self.max_enemy_hp = max_enemy_hp
+        self.combat_round = combat_round
+        self.expires_at = expires_at
+        self.view = None
+
+    @classmethod
+    def start(cls, character_id, character_name, enemy_name, enemy_description, location, char_level):
+        # Enemy HP scales with location (reduced for lower levels)
+        min_hp, max_hp = area_for(location).enemy_hp
+        enemy_hp = random.randint(min_hp, max_hp)
+        return cls(secrets.token_hex(8), character_id, character_name, enemy_name, enemy_description,
+                   location, char_level, enemy_hp, enemy_hp)
+
+    def row(self):
+        # Column order of the encounters table
+        return (self.encounter_id, self.character_id, self.character_name, self.enemy_name, self.enemy_description,
+                self.location, self.char_level, self.enemy_hp, self.max_enemy_hp, self.combat_round, self.expires_at)
+
+class EncounterStore:
+    def __init__(self, max_size=MAX_ENCOUNTERS, ttl=ENCOUNTER_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        # Least recently touched first; with a fixed TTL that is also soonest to expire
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, encounter, now=None):
+        # Returns the encounters pushed out to stay under max_size
+        now = time.time() if now is None else now
+        if encounter.expires_at <= now:
+            encounter.expires_at = now + self.ttl
+        self.entries[encounter.encounter_id] = encounter
+        self.entries.move_to_end(encounter.encounter_id)
+        evicted = []
+        while len(self.entries) > self.max_size:
+            evicted.append(self.entries.popitem(last=False)[1])
+        return evicted
+
+    def get(self, encounter_id, now=None):
+        # The encounter, with its TTL renewed, or None if it ended or expired
+        now = time.time() if now is None else now
+        encounter = self.entries.get(encounter_id)
+        if encounter is None or encounter.expires_at <= now:
+            return None
+        encounter.expires_at = now + self.ttl
+        self.entries.move_to_end(encounter_id)
+        return encounter
+
+    def remove(self, encounter_id):
+        return self.entries.pop(encounter_id, None)
+
+    def remove_character(self, character_id):
+        # A deleted character's fights; a linear scan, but deletes are rare
+        ended = [encounter for encounter in self.entries.values() if encounter.character_id == character_id]
+        for encounter in ended:
+            del self.entries[encounter.encounter_id]
+        return ended
+
+    def sweep(self, now=None):
+        # Pop expired encounters off the front; stops at the first live one
+        now = time.time() if now is None else now
+        expired = []
+        while self.entries:
+            encounter = next(iter(self.entries.values()))
+            if encounter.expires_at > now:
+                break
+            expired.append(self.entries.popitem(last=False)[1])
+        return expired
+
+encounters = EncounterStore()
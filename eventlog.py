@@ -0,0 +1,110 @@
+import json
+import os
+import time
+from collections import Counter
+
+# Append-only record of game actions. Every change to a character is one row
+# in events: the kind of action, the profile fields it left changed (as their
+# new values) and the net item quantities it added or removed. Buffered changes
+# are logged by the write-behind flush that stores them, in the same
+# transaction; immediate ones (create, rename, explore, ...) in their own.
+# After SNAPSHOT_EVERY events a character's full state is saved to snapshots,
+# so rebuilding it (replay.py) only applies the events after the latest one.
+# Characters that predate the log have a snapshot at seq 0 instead of a
+# character_created event.
+
+SNAPSHOT_EVERY = int(os.getenv("SNAPSHOT_EVERY", "100"))
+
+# Profile fields an event can set, in snapshot order
+FIELDS = ("user_id", "name", "nickname", "location", "level", "xp", "hp", "gp")
+
+def character_state(conn, character_id):
+    # The live state of a character in snapshot form, or None if it doesn't exist
+    row = conn.execute("""
+    SELECT user_id, character_name, nickname, active_location, level, xp, hp, gp
+    FROM profiles WHERE character_id = ?
+    """, (character_id,)).fetchone()
+    if row is None:
+        return None
+    state = dict(zip(FIELDS, row))
+    state["items"] = {str(item_id): quantity for item_id, quantity in conn.execute(
+        "SELECT item_id, quantity FROM inventory WHERE character_id = ? AND quantity > 0", (character_id,))}
+    return state
+
+def apply_event(state, kind, data):
+    # State after one event; None means the character doesn't exist
+    if kind == "character_created":
+        state = dict.fromkeys(FIELDS)
+        state["items"] = {}
+    elif state is None:
+        return None
+    elif kind == "character_deleted":
+        return None
+    else:
+        state = dict(state, items=dict(state["items"]))
+
+    for field in FIELDS:
+        if field in data:
+            state[field] = data[field]
+    for item_id, delta in data.get("items", {}).items():
+        quantity = state["items"].get(item_id, 0) + delta
+        if quantity > 0:
+            state["items"][item_id] = quantity
+        else:
+            state["items"].pop(item_id, None)
+    return state
+
+def diff(before, after):
+    # Event data between two (level, xp, hp, gp, Counter of item deltas) tuples
+    data = {field: new for field, old, new in zip(("level", "xp", "hp", "gp"), before[:4], after[:4]) if old != new}
+    items = {str(item_id): after[4][item_id] - before[4][item_id]
+             for item_id in after[4].keys() | before[4].keys() if after[4][item_id] != before[4][item_id]}
+    if items:
+        data["items"] = items
+    return data
+
+class EventLog:
+    def __init__(self, snapshot_every=SNAPSHOT_EVERY):
+        self.snapshot_every = snapshot_every
+        # Rows waiting for the write-behind flush that stores their state
+        self.queue = []
+        # character_id -> events logged since its last snapshot
+        self.since_snapshot = Counter()
+
+    def _row(self, character_id, kind, data):
+        self.since_snapshot[character_id] += 1
+        return time.time(), character_id, kind, json.dumps(data, separators=(",", ":"))
+
+    def _insert(self, conn, rows):
+        # seq is left to SQLite, which assigns it under the write lock, so processes sharing the database never collide
+        conn.executemany("INSERT INTO events (at, character_id, kind, data) VALUES (?, ?, ?, ?)", rows)
+
+    def record(self, character_id, kind, data):
+        # A buffered change: written by the next flush
+        self.queue.append(self._row(character_id, kind, data))
+
+    def append(self, conn, character_id, kind, data):
+        # An immediate change: inserted into the caller's transaction, before it commits
+        self._insert(conn, [self._row(character_id, kind, data)])
+
+    def take(self):
+        rows, self.queue = self.queue, []
+        return rows
+
+    def put_back(self, rows):
+        self.queue[:0] = rows
+
+    def write(self, conn, rows):
+        # Inside the flush transaction, after the state updates, so snapshots see them
+        self._insert(conn, rows)
+        for character_id in [c for c, count in self.since_snapshot.items() if count >= self.snapshot_every]:
+            # Only the latest snapshot is needed, plus the seq 0 one from before the log existed.
+            # Deleting first takes the write lock, so the state read next reflects exactly the
+            # character's events up to seq, including any that another process committed
+            conn.execute("DELETE FROM snapshots WHERE character_id = ? AND seq > 0", (character_id,))
+            state = character_state(conn, character_id)
+            if state is not None:
+                seq = conn.execute("SELECT MAX(seq) FROM events WHERE character_id = ?", (character_id,)).fetchone()[0]
+                conn.execute("INSERT INTO snapshots (character_id, seq, state) VALUES (?, ?, ?)",
+                             (character_id, seq, json.dumps(state, separators=(",", ":"))))
+            del self.since_snapshot[character_id]
@@ -0,0 +1,119 @@
+import argparse
+import logging
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+logger = logging.getLogger("launcher")
+
+# Runs the bot as N shard workers on one machine:
+#
+#   storage.py           owns the database; workers reach it over a Unix socket
+#   main.py (x workers)  each runs an AutoShardedClient for its share of the shards
+#
+# Shards are dealt round-robin, so worker i of W runs shards i, i+W, i+2W, ...
+# Only worker 0 syncs the command tree. Any child that exits is restarted with
+# a capped backoff; Ctrl+C or SIGTERM stops the workers first, then storage.
+#
+#   python launcher.py --shards 4 --workers 2
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def worker_metrics_file(path, worker):
+    # One textfile per worker; the node exporter merges them (series carry a worker label)
+    base, ext = os.path.splitext(path)
+    return f"{base}-worker{worker}{ext or '.prom'}"
+
+class Child:
+    def __init__(self, name, script, env):
+        self.name = name
+        self.script = script
+        self.env = env
+        self.process = None
+        self.restarts = 0
+        self.started_at = 0.0
+
+    def start(self):
+        self.process = subprocess.Popen([sys.executable, os.path.join(ROOT, self.script)], env=self.env, cwd=ROOT)
+        self.started_at = time.monotonic()
+        logger.info("Started %s (pid %d)", self.name, self.process.pid)
+
+    def stop(self, sig, timeout=30):
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.send_signal(sig)
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning("%s did not stop in %ds, killing it", self.name, timeout)
+            self.process.kill()
+            self.process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bot as several shard worker processes")
+    parser.add_argument("--shards", type=int, required=True, help="total shard count")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (capped at --shards)")
+    parser.add_argument("--storage-address", help="socket for the storage process (default: a fresh path in the temp dir)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    workers = max(1, min(args.workers, args.shards))
+    address = args.storage_address or os.path.join(tempfile.mkdtemp(prefix="rpgbot-"), "storage.sock")
+    base_env = dict(os.environ, STORAGE_ADDRESS=address, STORAGE_AUTHKEY=secrets.token_hex(16))
+
+    storage = Child("storage", "storage.py", base_env)
+    children = []
+    for worker in range(workers):
+        env = dict(base_env,
+                   WORKER_ID=str(worker),
+                   SHARD_COUNT=str(args.shards),
+                   SHARD_IDS=",".join(str(shard) for shard in range(worker, args.shards, workers)),
+                   SYNC_COMMANDS="1" if worker == 0 else "0")
+        if os.getenv("METRICS_FILE"):
+            env["METRICS_FILE"] = worker_metrics_file(os.environ["METRICS_FILE"], worker)
+        children.append(Child(f"worker {worker} (shards {env['SHARD_IDS']})", "main.py", env))
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+
+    storage.start()
+    # Workers can't do anything until storage is listening
+    if address.rpartition(":")[2].isdigit():
+        time.sleep(2)  # TCP address; nothing on disk to wait for
+    else:
+        while not os.path.exists(address) and storage.process.poll() is None:
+            time.sleep(0.1)
+    for child in children:
+        child.start()
+
+    try:
+        while True:
+            time.sleep(1)
+            for child in [storage] + children:
+                code = child.process.poll()
+                if code is None:
+                    continue
+                # Back off when a child keeps dying right after starting
+                if time.monotonic() - child.started_at < 60:
+                    child.restarts += 1
+                else:
+                    child.restarts = 0
+                delay = min(60, 2 ** child.restarts)
+                logger.warning("%s exited with %s, restarting in %ds", child.name, code, delay)
+                time.sleep(delay)
+                child.start()
+    except KeyboardInterrupt:
+        logger.info("Shutting down")
+    finally:
+        # discord.py shuts down cleanly on SIGINT; storage flushes its buffer on SIGTERM
+        for child in children:
+            child.stop(signal.SIGINT)
+        storage.stop(signal.SIGTERM)
+
+if __name__ == "__main__":
+    main()
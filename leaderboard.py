@@ -0,0 +1,112 @@
+from bisect import bisect_left, insort
+
+# Materialized rankings for /leaderboard. Every board is a sorted list of
+# (score, character_id) keys where a smaller score ranks higher, plus a map
+# from character to its current key. The write paths push each changed
+# character in, which moves one key (a bisect and a list splice), so reading
+# the top N is a slice and a character's rank is one bisect; the profiles
+# table is only scanned once, when the boards are first loaded.
+
+# Board -> (level, total XP, GP) to score; ties share a rank
+BOARDS = {
+    "level": lambda level, xp, gp: (-level, -xp),
+    "xp": lambda level, xp, gp: (-xp,),
+    "gp": lambda level, xp, gp: (-gp,),
+}
+
+class Ranking:
+    def __init__(self, score):
+        self.score = score
+        self.keys = []
+        # character_id -> its key in self.keys
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def load(self, stats):
+        self.entries = {character_id: (self.score(*values), character_id) for character_id, values in stats}
+        self.keys = sorted(self.entries.values())
+
+    def update(self, character_id, level, xp, gp):
+        key = (self.score(level, xp, gp), character_id)
+        old = self.entries.get(character_id)
+        if old == key:
+            return
+        if old is not None:
+            del self.keys[bisect_left(self.keys, old)]
+        self.entries[character_id] = key
+        insort(self.keys, key)
+
+    def remove(self, character_id):
+        old = self.entries.pop(character_id, None)
+        if old is not None:
+            del self.keys[bisect_left(self.keys, old)]
+
+    def rank(self, character_id):
+        # 1-based; everyone with the same score gets the best rank among them
+        key = self.entries.get(character_id)
+        if key is None:
+            return None
+        return bisect_left(self.keys, (key[0],)) + 1
+
+    def top(self, limit):
+        # [(rank, character_id)] for the first `limit` entries
+        top = []
+        for position, (score, character_id) in enumerate(self.keys[:limit]):
+            if top and score == self.keys[position - 1][0]:
+                top.append((top[-1][0], character_id))
+            else:
+                top.append((position + 1, character_id))
+        return top
+
+class Leaderboards:
+    def __init__(self):
+        self.loaded = False
+        self.boards = {name: Ranking(score) for name, score in BOARDS.items()}
+        # character_id -> [name, level, total XP, GP] for display
+        self.characters = {}
+
+    def load(self, rows):
+        # rows: (character_id, name, level, total XP, GP)
+        self.characters = {character_id: [name, level, xp, gp] for character_id, name, level, xp, gp in rows}
+        stats = [(character_id, values[1:]) for character_id, values in self.characters.items()]
+        for board in self.boards.values():
+            board.load(stats)
+        self.loaded = True
+
+    def add(self, character_id, name, level, xp, gp):
+        if not self.loaded:
+            return
+        self.characters[character_id] = [name, level, xp, gp]
+        for board in self.boards.values():
+            board.update(character_id, level, xp, gp)
+
+    def update(self, character_id, level, xp, gp):
+        # Before the first load there is nothing to keep current; load() reads the latest state
+        character = self.characters.get(character_id) if self.loaded else None
+        if character is None:
+            return
+        character[1:] = level, xp, gp
+        for board in self.boards.values():
+            board.update(character_id, level, xp, gp)
+
+    def rename(self, character_id, name):
+        character = self.characters.get(character_id)
+        if character is not None:
+            character[0] = name
+
+    def remove(self, character_id):
+        if self.characters.pop(character_id, None) is not None:
+            for board in self.boards.values():
+                board.remove(character_id)
+
+    def top(self, board, limit):
+        # [(rank, name, level, total XP, GP)]
+        return [(rank, *self.characters[character_id]) for rank, character_id in self.boards[board].top(limit)]
+
+    def rank(self, board, character_id):
+        # (rank, number of ranked characters), or None if the character is unknown
+        ranking = self.boards[board]
+        rank = ranking.rank(character_id)
+        return None if rank is None else (rank, len(ranking))
@@ -0,0 +1,59 @@
+import asyncio
+import contextlib
+import functools
+import inspect
+
+import database
+
+# Per-character serialization. Handlers that read a character, await, and
+# then write back (the Fight button reads HP and later stores the new value)
+# must not interleave with another handler for the same character, or one of
+# the writes is lost. Each character gets an asyncio.Lock while anything is
+# holding or waiting on it; different characters never wait on each other.
+# Locks are keyed by character_id rather than name, so a handler that still
+# knows a renamed character by its old name (an open fight) and one that uses
+# the new name wait on the same lock.
+
+class KeyedLocks:
+    def __init__(self):
+        # key -> [lock, number of holders + waiters]
+        self.locks = {}
+
+    def __len__(self):
+        return len(self.locks)
+
+    @contextlib.asynccontextmanager
+    async def hold(self, key):
+        entry = self.locks.get(key)
+        if entry is None:
+            entry = self.locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                # Nobody else needs it, so the table only holds characters in use
+                del self.locks[key]
+
+character_locks = KeyedLocks()
+
+async def character_key(user_id, character_name):
+    # A name that belongs to no character has no state to protect, so it locks under itself
+    character_id = await database.run(database.get_character_id, user_id, character_name)
+    return character_name if character_id is None else character_id
+
+def serialized(param="character_name"):
+    """Run an app command callback while holding the lock of the user's character named by `param`."""
+    def decorator(callback):
+        position = list(inspect.signature(callback).parameters).index(param)
+
+        @functools.wraps(callback)
+        async def wrapper(*args, **kwargs):
+            name = kwargs[param] if param in kwargs else args[position]
+            key = await character_key(args[0].user.id, name)
+            async with character_locks.hold(key):
+                return await callback(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,164 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Per-command latency, SQLite time, query count and error tracking. Handlers
+# are wrapped with instrument(); database.run() charges the time and queries
+# spent on the DB thread to whichever command is awaiting it.
+
+# Upper bounds in seconds, roughly doubling from 0.25ms to 10s
+DURATION_BUCKETS = (0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+class CommandStats:
+    __slots__ = ("wall", "db", "queries", "errors")
+
+    def __init__(self):
+        self.wall = Histogram(DURATION_BUCKETS)
+        self.db = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.errors = 0
+
+class Call:
+    __slots__ = ("db_seconds", "queries")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.queries = 0
+
+commands = {}
+# shard_id -> (connected, heartbeat latency in seconds), refreshed by the bot
+shards = {}
+# (command, "user" | "character") -> calls rejected by that rate limit budget
+throttled = {}
+current_call = contextvars.ContextVar("current_call", default=None)
+_db_thread = threading.local()
+
+def instrument(name, callback):
+    @functools.wraps(callback)
+    async def wrapper(*args, **kwargs):
+        call = Call()
+        token = current_call.set(call)
+        start = time.perf_counter()
+        failed = False
+        try:
+            return await callback(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            current_call.reset(token)
+            stats = commands.get(name)
+            if stats is None:
+                stats = commands[name] = CommandStats()
+            stats.wall.observe(time.perf_counter() - start)
+            stats.db.observe(call.db_seconds)
+            stats.queries.observe(call.queries)
+            if failed:
+                stats.errors += 1
+    return wrapper
+
+def instrumented(name):
+    # Decorator form for view buttons: put it under @discord.ui.button
+    return lambda callback: instrument(name, callback)
+
+def instrument_tree(tree):
+    for command in tree.walk_commands():
+        if hasattr(command, "_callback"):  # Groups have no callback of their own
+            command._callback = instrument(command.qualified_name, command._callback)
+
+def timed_db_call(call, func):
+    # Runs on the DB thread: time the helper and let the trace callback count its statements
+    if call is None:
+        return func()
+    _db_thread.call = call
+    start = time.perf_counter()
+    try:
+        return func()
+    finally:
+        call.db_seconds += time.perf_counter() - start
+        _db_thread.call = None
+
+def count_query(statement):
+    # sqlite3 trace callback, installed on every connection
+    call = getattr(_db_thread, "call", None)
+    if call is not None:
+        call.queries += 1
+
+def render_prometheus(prefix="rpgbot"):
+    lines = []
+    # Shard workers write one file each, so their series need telling apart
+    worker = f'worker="{os.environ["WORKER_ID"]}",' if os.getenv("WORKER_ID") else ""
+
+    def histogram(metric, help_text, attr, bounds_format):
+        lines.append(f"# HELP {prefix}_{metric} {help_text}")
+        lines.append(f"# TYPE {prefix}_{metric} histogram")
+        for name, stats in sorted(commands.items()):
+            h = getattr(stats, attr)
+            cumulative = 0
+            for bound, count in zip(h.bounds, h.counts):
+                cumulative += count
+                lines.append(f'{prefix}_{metric}_bucket{{{worker}command="{name}",le="{bounds_format(bound)}"}} {cumulative}')
+            lines.append(f'{prefix}_{metric}_bucket{{{worker}command="{name}",le="+Inf"}} {h.count}')
+            lines.append(f'{prefix}_{metric}_sum{{{worker}command="{name}"}} {h.sum}')
+            lines.append(f'{prefix}_{metric}_count{{{worker}command="{name}"}} {h.count}')
+
+    histogram("command_duration_seconds", "Wall time of each command or button press.", "wall", repr)
+    histogram("command_db_seconds", "Time each command spent running SQLite work.", "db", repr)
+    histogram("command_queries", "SQL statements executed per command.", "queries", str)
+
+    lines.append(f"# HELP {prefix}_command_errors_total Commands that raised an exception.")
+    lines.append(f"# TYPE {prefix}_command_errors_total counter")
+    for name, stats in sorted(commands.items()):
+        lines.append(f'{prefix}_command_errors_total{{{worker}command="{name}"}} {stats.errors}')
+
+    lines.append(f"# HELP {prefix}_throttled_total Calls rejected by a per-user or per-character rate limit.")
+    lines.append(f"# TYPE {prefix}_throttled_total counter")
+    for (name, scope), count in sorted(throttled.items()):
+        lines.append(f'{prefix}_throttled_total{{{worker}command="{name}",scope="{scope}"}} {count}')
+
+    lines.append(f"# HELP {prefix}_shard_up Whether the shard's gateway connection is open.")
+    lines.append(f"# TYPE {prefix}_shard_up gauge")
+    for shard_id, (up, _) in sorted(shards.items()):
+        lines.append(f'{prefix}_shard_up{{{worker}shard="{shard_id}"}} {int(up)}')
+    lines.append(f"# HELP {prefix}_shard_latency_seconds Gateway heartbeat latency per shard.")
+    lines.append(f"# TYPE {prefix}_shard_latency_seconds gauge")
+    for shard_id, (_, latency) in sorted(shards.items()):
+        lines.append(f'{prefix}_shard_latency_seconds{{{worker}shard="{shard_id}"}} {latency}')
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path):
+    # Write-then-rename so the node exporter never scrapes a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
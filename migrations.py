@@ -0,0 +1,290 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Numbered schema steps. The database's PRAGMA user_version records how many
+# have been applied, so startup only runs the ones that are still pending.
+# Never edit or reorder a shipped step; append a new one instead.
+
+def _has_column(conn, table, column):
+    return conn.execute("SELECT 1 FROM pragma_table_info(?) WHERE name = ?", (table, column)).fetchone() is not None
+
+def migration_1_base_schema(conn):
+    # Table for character profiles
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS profiles (
+        character_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        character_name TEXT,
+        nickname TEXT,
+        hp INTEGER,
+        level INTEGER DEFAULT 0,
+        xp INTEGER DEFAULT 0,
+        weapon TEXT,
+        active_location TEXT,
+        gp INTEGER DEFAULT 0
+    )
+    """)
+
+    # Databases created before nicknames and GP existed
+    if not _has_column(conn, "profiles", "nickname"):
+        conn.execute("ALTER TABLE profiles ADD COLUMN nickname TEXT")
+    if not _has_column(conn, "profiles", "gp"):
+        conn.execute("ALTER TABLE profiles ADD COLUMN gp INTEGER DEFAULT 0")
+
+    # Table for character inventories
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS inventory (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        character_id INTEGER,
+        item_name TEXT,
+        description TEXT,
+        value INTEGER,
+        hp_effect INTEGER,
+        FOREIGN KEY (character_id) REFERENCES profiles(character_id)
+    )
+    """)
+
+    # Table for enemies
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS enemies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        description TEXT,
+        level_min INTEGER,
+        level_max INTEGER,
+        location TEXT
+    )
+    """)
+
+    # Table for loot items
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS loot_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        description TEXT,
+        value INTEGER,
+        hp_effect INTEGER,
+        drop_rate REAL,
+        location TEXT
+    )
+    """)
+
+def migration_2_lookup_indexes(conn):
+    # Ownership checks: WHERE user_id = ? AND character_name = ? (character_id is the rowid, so this covers it)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_profiles_user_name ON profiles (user_id, character_name)")
+    # Inventory lookups for sell/remove/heal and the profile listing
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_inventory_character_item ON inventory (character_id, item_name)")
+    # Random encounters and loot are always filtered by location
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_enemies_location ON enemies (location)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_loot_items_location ON loot_items (location)")
+
+def migration_3_unique_character_names(conn):
+    # Older builds could race two identical names in; keep the oldest and suffix the rest with their id
+    duplicates = conn.execute("""
+    SELECT character_id, character_name FROM profiles p
+    WHERE EXISTS (
+        SELECT 1 FROM profiles older
+        WHERE older.character_name = p.character_name AND older.character_id < p.character_id
+    )
+    """).fetchall()
+    for character_id, character_name in duplicates:
+        logger.warning("Renaming duplicate character %r (id %s)", character_name, character_id)
+        conn.execute("UPDATE profiles SET character_name = ? WHERE character_id = ?",
+                     (f"{character_name} #{character_id}", character_id))
+
+    # Also serves every lookup by character_name alone
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_profiles_character_name ON profiles (character_name)")
+
+def migration_4_inventory_stacks(conn):
+    # One row per distinct item instead of a copy of its description in every inventory row
+    conn.execute("""
+    CREATE TABLE items (
+        item_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        description TEXT,
+        value INTEGER NOT NULL DEFAULT 0,
+        hp_effect INTEGER NOT NULL DEFAULT 0,
+        UNIQUE (name, value, hp_effect)
+    )
+    """)
+    conn.execute("""
+    INSERT OR IGNORE INTO items (name, description, value, hp_effect)
+    SELECT item_name, description, COALESCE(value, 0), COALESCE(hp_effect, 0)
+    FROM inventory
+    ORDER BY id
+    """)
+
+    # Fold the one-row-per-item inventory into (character, item, quantity) stacks
+    conn.execute("""
+    CREATE TABLE inventory_stacks (
+        character_id INTEGER NOT NULL REFERENCES profiles(character_id),
+        item_id INTEGER NOT NULL REFERENCES items(item_id),
+        quantity INTEGER NOT NULL CHECK (quantity >= 0),
+        PRIMARY KEY (character_id, item_id)
+    ) WITHOUT ROWID
+    """)
+    conn.execute("""
+    INSERT INTO inventory_stacks (character_id, item_id, quantity)
+    SELECT inv.character_id, items.item_id, COUNT(*)
+    FROM inventory inv
+    JOIN items ON items.name = inv.item_name
+        AND items.value = COALESCE(inv.value, 0)
+        AND items.hp_effect = COALESCE(inv.hp_effect, 0)
+    WHERE inv.character_id IS NOT NULL
+    GROUP BY inv.character_id, items.item_id
+    """)
+    conn.execute("DROP TABLE inventory")
+    conn.execute("ALTER TABLE inventory_stacks RENAME TO inventory")
+
+def migration_5_content_tables(conn):
+    # Shared enemies (Brute, Super Soldier, ...) were copied into every location; keep one
+    # row per enemy and map it to the locations and level ranges it appears in
+    conn.execute("""
+    CREATE TABLE enemy_types (
+        enemy_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        description TEXT
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE enemy_locations (
+        location TEXT NOT NULL,
+        enemy_id INTEGER NOT NULL REFERENCES enemy_types(enemy_id),
+        level_min INTEGER,
+        level_max INTEGER,
+        PRIMARY KEY (location, enemy_id)
+    ) WITHOUT ROWID
+    """)
+    conn.execute("""
+    INSERT OR IGNORE INTO enemy_types (name, description)
+    SELECT name, description FROM enemies
+    WHERE name IS NOT NULL
+    ORDER BY id
+    """)
+    conn.execute("""
+    INSERT OR IGNORE INTO enemy_locations (location, enemy_id, level_min, level_max)
+    SELECT e.location, t.enemy_id, e.level_min, e.level_max
+    FROM enemies e
+    JOIN enemy_types t ON t.name = e.name
+    WHERE e.location IS NOT NULL
+    ORDER BY e.id
+    """)
+    conn.execute("DROP TABLE enemies")
+
+    # Re-running preload duplicated loot rows; keep the oldest and make (location, name) the key
+    conn.execute("""
+    DELETE FROM loot_items
+    WHERE id NOT IN (SELECT MIN(id) FROM loot_items GROUP BY location, name)
+    """)
+    conn.execute("DROP INDEX IF EXISTS idx_loot_items_location")
+    conn.execute("CREATE UNIQUE INDEX idx_loot_items_location_name ON loot_items (location, name)")
+
+    # Bookkeeping for the content loader (hash of the last loaded content file)
+    conn.execute("""
+    CREATE TABLE content_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """)
+
+def migration_6_encounters(conn):
+    # Fights in progress, so their buttons keep working after a restart
+    conn.execute("""
+    CREATE TABLE encounters (
+        encounter_id TEXT PRIMARY KEY,
+        character_id INTEGER NOT NULL,
+        character_name TEXT NOT NULL,
+        enemy_name TEXT NOT NULL,
+        enemy_description TEXT,
+        location TEXT,
+        char_level INTEGER NOT NULL,
+        enemy_hp INTEGER NOT NULL,
+        max_enemy_hp INTEGER NOT NULL,
+        combat_round INTEGER NOT NULL DEFAULT 1,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX idx_encounters_expires_at ON encounters (expires_at)")
+
+def migration_7_expeditions(conn):
+    # One row per character away on /expedition, with its rewards rolled up front;
+    # the scheduler pulls due rows through the due_at index
+    conn.execute("""
+    CREATE TABLE expeditions (
+        character_id INTEGER PRIMARY KEY,
+        location TEXT NOT NULL,
+        channel_id INTEGER,
+        started_at REAL NOT NULL,
+        due_at REAL NOT NULL,
+        xp INTEGER NOT NULL,
+        loot TEXT NOT NULL
+    )
+    """)
+    conn.execute("CREATE INDEX idx_expeditions_due_at ON expeditions (due_at)")
+
+def migration_8_hp_regen(conn):
+    # When the stored hp was last brought up to date; current HP is derived from it on read
+    conn.execute("ALTER TABLE profiles ADD COLUMN hp_updated_at REAL")
+    conn.execute("UPDATE profiles SET hp_updated_at = CAST(strftime('%s', 'now') AS REAL)")
+
+def migration_9_event_log(conn):
+    # Append-only log of game actions (see eventlog.py) and per-character snapshots of it
+    conn.execute("""
+    CREATE TABLE events (
+        seq INTEGER PRIMARY KEY,
+        at REAL NOT NULL,
+        character_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        data TEXT NOT NULL
+    )
+    """)
+    conn.execute("CREATE INDEX idx_events_character_seq ON events (character_id, seq)")
+    conn.execute("""
+    CREATE TABLE snapshots (
+        character_id INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        state TEXT NOT NULL,
+        PRIMARY KEY (character_id, seq)
+    ) WITHOUT ROWID
+    """)
+    # Characters that predate the log start from a snapshot at seq 0
+    conn.execute("""
+    INSERT INTO snapshots (character_id, seq, state)
+    SELECT p.character_id, 0, json_object(
+        'user_id', p.user_id, 'name', p.character_name, 'nickname', p.nickname, 'location', p.active_location,
+        'level', p.level, 'xp', p.xp, 'hp', p.hp, 'gp', p.gp,
+        'items', json((
+            SELECT json_group_object(CAST(i.item_id AS TEXT), i.quantity)
+            FROM inventory i WHERE i.character_id = p.character_id AND i.quantity > 0
+        ))
+    )
+    FROM profiles p
+    """)
+
+MIGRATIONS = [
+    migration_1_base_schema,
+    migration_2_lookup_indexes,
+    migration_3_unique_character_names,
+    migration_4_inventory_stacks,
+    migration_5_content_tables,
+    migration_6_encounters,
+    migration_7_expeditions,
+    migration_8_hp_regen,
+    migration_9_event_log,
+]
+
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        logger.info("Applying migration %d: %s", number, step.__name__)
+        # Each step and its version bump commit together or not at all
+        conn.execute("BEGIN")
+        try:
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return conn.execute("PRAGMA user_version").fetchone()[0]
@@ -0,0 +1,176 @@
+import functools
+import inspect
+import os
+import time
+
+import metrics
+
+# Per-command call budgets. Each command has a token bucket per user and one
+# per character; a call spends a token from both and is rejected, before any
+# database work, if either is empty. A bucket that has refilled completely is
+# the same as no bucket, so it is dropped. Instead of a timer per bucket, each
+# new bucket is filed in a timing wheel under the time it will be full, and
+# every acquire() advances the wheel to now and drops whatever came due.
+# A call can cost more than one token: a /loot call spends one per search.
+
+RATE_LIMITS = os.getenv("RATE_LIMITS", "1") == "1"
+
+class Budget:
+    __slots__ = ("per_character", "per_user")
+
+    def __init__(self, per_character, per_user):
+        # (calls, seconds): a full bucket allows `calls` at once and refills over `seconds`
+        self.per_character = per_character
+        self.per_user = per_user
+
+BUDGETS = {
+    "explore": Budget((3, 30), (8, 30)),
+    # Counted in searches: one every 6s per character and 0.4/s per user, with room for a full 25-search run
+    "loot": Budget((25, 150), (60, 150)),
+    "fight": Budget((3, 30), (8, 30)),
+    "buy": Budget((10, 20), (20, 20)),
+    "sell_item": Budget((10, 20), (20, 20)),
+    "heal": Budget((5, 20), (10, 20)),
+    "encounter.fight": Budget((10, 10), (20, 10)),
+    "encounter.flee": Budget((5, 10), (10, 10)),
+}
+
+class TimingWheel:
+    """Hashed timing wheel: O(1) to schedule a key, O(1) per key when it comes due.
+
+    Keys are only ever delivered late, never early, except when their deadline is
+    more than a full turn of the wheel away; the owner checks the real deadline
+    and schedules them again.
+    """
+
+    __slots__ = ("tick", "slots", "current")
+
+    def __init__(self, tick=1.0, size=256, now=None):
+        self.tick = tick
+        self.slots = [[] for _ in range(size)]
+        self.current = int((time.monotonic() if now is None else now) / tick)
+
+    def __len__(self):
+        return sum(len(slot) for slot in self.slots)
+
+    def schedule(self, key, deadline):
+        # Rounded up to the next tick, and never into the slot that has already been emptied
+        tick = max(-int(-deadline // self.tick), self.current + 1)
+        self.slots[tick % len(self.slots)].append(key)
+
+    def advance(self, now):
+        # Keys in the slots passed since the last call
+        target = int(now / self.tick)
+        due = []
+        for tick in range(self.current + 1, min(target, self.current + len(self.slots)) + 1):
+            slot = tick % len(self.slots)
+            if self.slots[slot]:
+                due.extend(self.slots[slot])
+                self.slots[slot] = []
+        self.current = max(self.current, target)
+        return due
+
+class Limiter:
+    def __init__(self, budgets=BUDGETS, wheel=None):
+        self.budgets = budgets
+        self.wheel = wheel or TimingWheel()
+        # (command, "user" | "character", id) -> [tokens, updated at]
+        self.buckets = {}
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def _limit(self, key):
+        budget = self.budgets[key[0]]
+        return budget.per_user if key[1] == "user" else budget.per_character
+
+    def _tokens(self, key, now):
+        calls, seconds = self._limit(key)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return calls
+        return min(calls, bucket[0] + (now - bucket[1]) * calls / seconds)
+
+    def expire(self, now):
+        for key in self.wheel.advance(now):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                continue
+            calls, seconds = self._limit(key)
+            full_at = bucket[1] + (calls - bucket[0]) * seconds / calls
+            if full_at <= now:
+                del self.buckets[key]
+            else:
+                # Spent again since it was filed
+                self.wheel.schedule(key, full_at)
+
+    def acquire(self, command, user_id, character=None, now=None, cost=1):
+        """Spend `cost` tokens; returns 0 if allowed, else the seconds until it would be."""
+        if command not in self.budgets:
+            return 0
+        now = time.monotonic() if now is None else now
+        self.expire(now)
+
+        keys = [(command, "user", user_id)]
+        if character is not None:
+            keys.append((command, "character", character))
+        tokens = [self._tokens(key, now) for key in keys]
+
+        wait = 0
+        for key, available in zip(keys, tokens):
+            if available < cost:
+                calls, seconds = self._limit(key)
+                if not wait:
+                    # Counted once per rejected call, under the first budget that ran out
+                    metrics.throttled[command, key[1]] = metrics.throttled.get((command, key[1]), 0) + 1
+                wait = max(wait, (cost - available) * seconds / calls)
+        if wait:
+            return wait
+
+        for key, available in zip(keys, tokens):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                calls, seconds = self._limit(key)
+                self.buckets[key] = [available - cost, now]
+                self.wheel.schedule(key, now + cost * seconds / calls)
+            else:
+                bucket[0], bucket[1] = available - cost, now
+        return 0
+
+limiter = Limiter()
+
+async def throttle(interaction, command, character=None, cost=1):
+    """Reply and return True if the call is over budget."""
+    if not RATE_LIMITS:
+        return False
+    wait = limiter.acquire(command, interaction.user.id, character, cost=cost)
+    if not wait:
+        return False
+    await interaction.response.send_message(
+        f"<a:tickred:1373240267880267836> ┃ Slow down! Try again in {max(1, round(wait))}s.", ephemeral=True)
+    return True
+
+def throttled(command, param="character_name", cost=None):
+    """Reject an app command callback that is over the budget of the user and the character named by `param`.
+
+    With `cost`, the call spends as many tokens as the value of that parameter.
+    """
+    def decorator(callback):
+        parameters = inspect.signature(callback).parameters
+        names = list(parameters)
+
+        def argument(name, args, kwargs):
+            # args excludes the interaction; an omitted parameter has its default
+            if name in kwargs:
+                return kwargs[name]
+            position = names.index(name) - 1
+            return args[position] if position < len(args) else parameters[name].default
+
+        @functools.wraps(callback)
+        async def wrapper(interaction, *args, **kwargs):
+            character = argument(param, args, kwargs)
+            if await throttle(interaction, command, character, argument(cost, args, kwargs) if cost else 1):
+                return
+            return await callback(interaction, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,72 @@
+import argparse
+import json
+import sqlite3
+import sys
+
+from eventlog import apply_event, character_state
+
+# Rebuild every character's profile and inventory from the event log and
+# check the result against the live tables. Each character starts from its
+# latest snapshot (or, with --full, from the seq 0 snapshot taken when the log
+# was introduced) and applies its later events in order. Reads only, so it is
+# safe to run next to the bot; anything still in the bot's write-behind buffer
+# is in neither the log nor the tables yet.
+
+def rebuild(conn, character_ids=None, full=False):
+    """character_id -> rebuilt state (None if deleted), replaying after each character's snapshot."""
+    ids = f"AND character_id IN ({','.join('?' * len(character_ids))})" if character_ids else ""
+    params = list(character_ids or ())
+
+    states, starts = {}, {}
+    # Rows come oldest first, so the latest snapshot wins
+    for character_id, seq, state in conn.execute(f"""
+    SELECT character_id, seq, state FROM snapshots
+    WHERE {"seq = 0" if full else "1"} {ids}
+    ORDER BY character_id, seq
+    """, params):
+        states[character_id] = json.loads(state)
+        starts[character_id] = seq
+
+    for character_id, seq, kind, data in conn.execute(f"""
+    SELECT character_id, seq, kind, data FROM events
+    WHERE 1 {ids}
+    ORDER BY character_id, seq
+    """, params):
+        if seq > starts.get(character_id, 0):
+            states[character_id] = apply_event(states.get(character_id), kind, json.loads(data))
+    return states
+
+def check(conn, character_ids=None, full=False):
+    # (character_id, rebuilt, live) for every character that doesn't match
+    states = rebuild(conn, character_ids, full)
+    if character_ids:
+        live_ids = set(character_ids)
+    else:
+        live_ids = {row[0] for row in conn.execute("SELECT character_id FROM profiles")}
+    mismatches = []
+    for character_id in sorted(states.keys() | live_ids):
+        rebuilt = states.get(character_id)
+        live = character_state(conn, character_id)
+        if rebuilt != live:
+            mismatches.append((character_id, rebuilt, live))
+    return len(states.keys() | live_ids), mismatches
+
+def describe(rebuilt, live):
+    if rebuilt is None or live is None:
+        return f"rebuilt {'missing' if rebuilt is None else 'present'}, live {'missing' if live is None else 'present'}"
+    return ", ".join(f"{key}: {rebuilt.get(key)!r} != {live.get(key)!r}"
+                     for key in sorted(rebuilt.keys() | live.keys()) if rebuilt.get(key) != live.get(key))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild profiles and inventory from the event log and compare with the live tables")
+    parser.add_argument("database", nargs="?", default="game_database.db")
+    parser.add_argument("--character", type=int, action="append", help="only check this character_id (repeatable)")
+    parser.add_argument("--full", action="store_true", help="ignore later snapshots and replay each character's whole log")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(f"file:{args.database}?mode=ro", uri=True)
+    checked, mismatches = check(conn, args.character, args.full)
+    for character_id, rebuilt, live in mismatches:
+        print(f"character {character_id}: {describe(rebuilt, live)}")
+    print(f"{checked - len(mismatches)}/{checked} characters match the event log")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,83 @@
+import inspect
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+
+import database
+
+logger = logging.getLogger(__name__)
+
+# Storage process for sharded deployments (see launcher.py). It is the only
+# process that writes to the database: shard workers send (helper name, args,
+# kwargs) over a local socket and every call runs on this process's single DB
+# thread, so the write-behind buffer and its one-writer assumptions hold no
+# matter how many workers there are.
+
+# Lifecycle helpers that make no sense to call remotely
+NOT_REMOTE = {"connect", "get_connection", "close_connection", "run", "call", "shutdown", "refresh_catalog", "parse_address"}
+
+def resolve(name):
+    func = getattr(database, name, None)
+    if (name.startswith("_") or name in NOT_REMOTE or not inspect.isfunction(func)
+            or func.__module__ != database.__name__):
+        raise ValueError(f"{name!r} is not a remote database helper")
+    return func
+
+def handle(conn):
+    with conn:
+        while True:
+            try:
+                name, args, kwargs = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                conn.send((True, database.call(resolve(name), *args, **kwargs)))
+            except Exception as e:
+                conn.send((False, e))
+
+def flush_periodically(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            database.call(database.flush_pending)
+        except Exception:
+            logger.exception("Failed to flush buffered writes")
+
+def serve(address, authkey):
+    database.call(database.setup_database)
+    database.call(database.seed_content)
+
+    address = database.parse_address(address)
+    if isinstance(address, str) and os.path.exists(address):
+        os.unlink(address)  # Stale socket from a previous run
+    listener = Listener(address, authkey=authkey)
+    if database.WRITE_BEHIND_INTERVAL > 0:
+        threading.Thread(target=flush_periodically, args=(database.WRITE_BEHIND_INTERVAL,), daemon=True).start()
+
+    logger.info("Storage process serving %s on %s", database.DB_NAME, listener.address)
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, OSError) as e:
+                logger.warning("Rejected storage connection: %s", e)
+                continue
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+    finally:
+        listener.close()
+        database.shutdown()
+        logger.info("Storage process stopped")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    # Let the launcher stop us with SIGTERM and still flush buffered writes
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        serve(os.environ["STORAGE_ADDRESS"], database.STORAGE_AUTHKEY)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,181 @@
+import logging
+import time
+from collections import Counter
+
+from eventlog import diff
+
+logger = logging.getLogger(__name__)
+
+# Write-behind buffer for the hot per-character columns (hp, xp, level, gp),
+# inventory adds/removes, in-progress encounter state and finished expeditions,
+# plus the event log rows describing those changes. Every mutation lands here first and is written
+# out together with everything else pending in one transaction, either on a
+# timer or once enough mutations pile up. It is only ever touched from the DB
+# thread, so it needs no locking.
+
+class PendingCharacter:
+    __slots__ = ("level", "xp", "hp", "gp", "hp_updated_at", "items")
+
+    def __init__(self, level, xp, hp, gp, hp_updated_at):
+        self.level = level
+        self.xp = xp
+        self.hp = hp
+        self.gp = gp
+        self.hp_updated_at = hp_updated_at
+        # item_id -> net quantity added (negative = removed)
+        self.items = Counter()
+
+class WriteBehindBuffer:
+    def __init__(self, max_pending):
+        # 0 disables buffering: every mutation is flushed straight away
+        self.max_pending = max_pending
+        self.characters = {}
+        # encounter_id -> full encounters row, or None to delete it
+        self.encounters = {}
+        # character_ids whose expedition rewards are applied but whose row isn't deleted yet
+        self.expeditions = set()
+        self.mutations = 0
+        # Called as on_change(character_id, state) after each mutation of a character
+        self.on_change = None
+        # regenerate(hp, level, hp_updated_at, now) -> (hp, hp_updated_at), applied whenever a character is loaded
+        self.regenerate = None
+        # EventLog that each mutation is recorded in, if any
+        self.log = None
+        self.changed = set()
+        # character_id -> (level, xp, hp, gp, items) before the mutation in progress
+        self.baselines = {}
+
+    def load(self, conn, character_id):
+        # Pending state for a character, read from the table on first touch.
+        # Only mutators load, so the character is reported to on_change at the next touched()
+        state = self.characters.get(character_id)
+        if state is None:
+            row = conn.execute("SELECT level, xp, hp, gp, hp_updated_at FROM profiles WHERE character_id = ?", (character_id,)).fetchone()
+            if row is None:
+                return None
+            state = self.characters[character_id] = PendingCharacter(*row)
+        if self.regenerate is not None:
+            # Bring HP up to date before the caller changes it. Logged as its own event, before the
+            # baseline is taken, so the caller's event only holds what the caller changed
+            hp = state.hp
+            state.hp, state.hp_updated_at = self.regenerate(state.hp, state.level, state.hp_updated_at, time.time())
+            if state.hp != hp and self.log is not None:
+                self.log.record(character_id, "hp_regenerated", {"hp": state.hp})
+        if character_id not in self.baselines:
+            self.baselines[character_id] = (state.level, state.xp, state.hp, state.gp, Counter(state.items))
+        self.changed.add(character_id)
+        return state
+
+    def get(self, character_id):
+        return self.characters.get(character_id)
+
+    def discard(self, character_id):
+        # A deleted character: drop its buffered state and its fights' unsaved rows
+        self.characters.pop(character_id, None)
+        self.changed.discard(character_id)
+        self.baselines.pop(character_id, None)
+        for encounter_id in [e for e, row in self.encounters.items() if row is not None and row[1] == character_id]:
+            del self.encounters[encounter_id]
+
+    def save_encounter(self, conn, row):
+        self.encounters[row[0]] = row
+        self.touched(conn)
+
+    def delete_encounter(self, conn, encounter_id):
+        self.encounters[encounter_id] = None
+        self.touched(conn)
+
+    def finish_expedition(self, conn, character_id):
+        # Deleted in the same transaction that stores the rewards, so they apply exactly once
+        self.expeditions.add(character_id)
+        self.touched(conn, "expedition_returned")
+
+    def touched(self, conn, event=None):
+        # Call after every mutation, naming the kind of event it was; flushes once the buffer is over its size bound
+        self.mutations += 1
+        if self.changed:
+            changed, self.changed = self.changed, set()
+            for character_id in changed:
+                state = self.characters.get(character_id)
+                baseline = self.baselines.pop(character_id, None)
+                if state is None:
+                    continue
+                # A character loaded but left as it was (a purchase it couldn't afford) logs nothing,
+                # rather than an event under the kind of whichever mutation comes next
+                if self.log is not None and baseline is not None:
+                    data = diff(baseline, (state.level, state.xp, state.hp, state.gp, state.items))
+                    if data:
+                        self.log.record(character_id, event or "changed", data)
+                if self.on_change is not None:
+                    self.on_change(character_id, state)
+        if self.mutations >= self.max_pending:
+            self.flush(conn)
+
+    def flush(self, conn):
+        if not self.characters and not self.encounters and not self.expeditions and not (self.log and self.log.queue):
+            return 0
+        characters, self.characters = self.characters, {}
+        encounters, self.encounters = self.encounters, {}
+        expeditions, self.expeditions = self.expeditions, set()
+        events = self.log.take() if self.log is not None else []
+        # Baselines are relative to the flushed item deltas; a character loaded without a
+        # touched() (a purchase it couldn't afford) changed nothing, so drop those too
+        self.baselines.clear()
+        self.changed.clear()
+        mutations, self.mutations = self.mutations, 0
+
+        added, removed = [], []
+        for character_id, state in characters.items():
+            for item_id, count in state.items.items():
+                if count > 0:
+                    added.append((character_id, item_id, count))
+                elif count < 0:
+                    removed.append((-count, character_id, item_id))
+
+        try:
+            conn.executemany("""
+            UPDATE profiles SET level = ?, xp = ?, hp = ?, gp = ?, hp_updated_at = ?
+            WHERE character_id = ?
+            """, [(s.level, s.xp, s.hp, s.gp, s.hp_updated_at, character_id) for character_id, s in characters.items()])
+            conn.executemany("""
+            INSERT INTO inventory (character_id, item_id, quantity)
+            VALUES (?, ?, ?)
+            ON CONFLICT (character_id, item_id) DO UPDATE SET quantity = quantity + excluded.quantity
+            """, added)
+            conn.executemany("""
+            UPDATE inventory SET quantity = MAX(quantity - ?, 0)
+            WHERE character_id = ? AND item_id = ?
+            """, removed)
+            conn.executemany("""
+            DELETE FROM inventory
+            WHERE character_id = ? AND item_id = ? AND quantity = 0
+            """, [(character_id, item_id) for _, character_id, item_id in removed])
+            conn.executemany("""
+            INSERT OR REPLACE INTO encounters (
+                encounter_id, character_id, character_name, enemy_name, enemy_description,
+                location, char_level, enemy_hp, max_enemy_hp, combat_round, expires_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [row for row in encounters.values() if row is not None])
+            conn.executemany("DELETE FROM encounters WHERE encounter_id = ?",
+                             [(encounter_id,) for encounter_id, row in encounters.items() if row is None])
+            conn.executemany("DELETE FROM expeditions WHERE character_id = ?", [(character_id,) for character_id in expeditions])
+            if self.log is not None:
+                self.log.write(conn, events)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            # Keep the changes for the next attempt; anything buffered since is newer and wins
+            characters.update(self.characters)
+            self.characters = characters
+            encounters.update(self.encounters)
+            self.encounters = encounters
+            self.expeditions |= expeditions
+            if self.log is not None:
+                self.log.put_back(events)
+            self.mutations += mutations
+            raise
+
+        logger.debug("Flushed %d mutations for %d characters, %d encounters and %d expeditions",
+                     mutations, len(characters), len(encounters), len(expeditions))
+        return len(characters) + len(encounters) + len(expeditions)